@@ -0,0 +1,109 @@
+"""
+Benchmark CP-SAT parameter sets on representative playlists.
+
+Runs every candidate in CANDIDATES on a suite of seeded random libraries through
+PlaylistOptimizer(solver_params=...) and reports how many instances each proves optimal
+and how long it takes. Use it before changing the solver defaults in optimizer.py, or to
+find overrides for your own library:
+
+    uv run python scripts/tune_cpsat.py --sizes 50 100 200 --seeds 3 --time-limit 5
+    uv run python scripts/tune_cpsat.py --library my_tracks.json --workers 8
+"""
+
+import argparse
+import math
+import random
+import time
+from pathlib import Path
+from typing import Any
+
+from ortools.sat.python import cp_model
+
+from djkr8 import PlaylistOptimizer, Track
+from djkr8.cli import load_tracks_from_json
+
+# Parameter sets to compare; {} is the optimizer's built-in configuration
+CANDIDATES: dict[str, dict[str, Any]] = {
+    "default": {},
+    "linearization-1": {"linearization_level": 1},
+    "no-probing": {"cp_model_probing_level": 0},
+    "probing-2": {"cp_model_probing_level": 2},  # CP-SAT's own default
+    "no-symmetry": {"symmetry_level": 0},
+    "lp-search": {"search_branching": cp_model.LP_SEARCH},
+    "pseudo-cost": {"search_branching": cp_model.PSEUDO_COST_SEARCH},
+    "hint-search": {"search_branching": cp_model.HINT_SEARCH},
+    "quick-restart": {"search_branching": cp_model.PORTFOLIO_WITH_QUICK_RESTART_SEARCH},
+    "no-lns": {"use_lns": False},
+}
+
+KEYS = [f"{hour}{mode}" for hour in range(1, 13) for mode in "AB"]
+
+
+def random_library(num_tracks: int, seed: int) -> list[Track]:
+    """A library of tracks with uniformly random keys, BPMs, energies and durations."""
+    rng = random.Random(seed)
+    return [
+        Track(
+            id=f"t{i}",
+            key=rng.choice(KEYS),
+            bpm=float(rng.randint(110, 140)),
+            energy=rng.randint(1, 5),
+            duration=float(rng.randint(150, 400)),
+        )
+        for i in range(num_tracks)
+    ]
+
+
+def run_candidate(
+    params: dict[str, Any], libraries: list[list[Track]], time_limit: float, workers: int
+) -> tuple[int, float, int]:
+    """Return (instances proved optimal, geometric mean solve time, total playlist length)."""
+    proved = 0
+    total_length = 0
+    log_time = 0.0
+    for tracks in libraries:
+        optimizer = PlaylistOptimizer(
+            time_limit_seconds=time_limit,
+            num_workers=workers,
+            max_violation_pct=0.3,
+            warm_start=False,
+            solver_params=params,
+        )
+        start = time.perf_counter()
+        result = optimizer.optimize(tracks)
+        elapsed = time.perf_counter() - start
+        proved += result.solver_status == "optimal"
+        total_length += len(result.playlist)
+        log_time += math.log(max(elapsed, 1e-3))
+    return proved, math.exp(log_time / len(libraries)), total_length
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--seeds", type=int, default=3, help="Random libraries per size")
+    parser.add_argument("--library", type=Path, help="Benchmark a JSON track file instead")
+    parser.add_argument("--time-limit", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.library:
+        libraries = [load_tracks_from_json(args.library)]
+    else:
+        libraries = [
+            random_library(size, seed) for size in args.sizes for seed in range(args.seeds)
+        ]
+
+    print(f"{'candidate':<22} {'optimal':>9} {'geo-mean':>10} {'length':>8}")
+    results = {}
+    for name, params in CANDIDATES.items():
+        proved, mean_time, length = run_candidate(params, libraries, args.time_limit, args.workers)
+        results[name] = (-proved, mean_time, -length)
+        print(f"{name:<22} {proved:>5}/{len(libraries):<3} {mean_time:>9.2f}s {length:>8}")
+
+    best = min(results, key=results.__getitem__)
+    print(f"\nBest: {best} {CANDIDATES[best]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """DJ Playlist Optimizer - Harmonic mixing with Google OR-Tools."""
 
-from djkr8.bpm import bpm_compatible, get_bpm_difference
+from djkr8.bpm import bpm_compat_matrix, bpm_compatible, get_bpm_difference
 from djkr8.camelot import (
     get_compatible_keys,
     is_harmonic_compatible,
@@ -10,6 +10,7 @@ from djkr8.models import (
     HarmonicLevel,
     PlaylistResult,
     PlaylistStatistics,
+    SolveMode,
     Track,
     TransitionInfo,
 )
@@ -22,8 +23,10 @@ __all__ = [
     "PlaylistOptimizer",
     "PlaylistResult",
     "PlaylistStatistics",
+    "SolveMode",
     "Track",
     "TransitionInfo",
+    "bpm_compat_matrix",
     "bpm_compatible",
     "get_bpm_difference",
     "get_compatible_keys",
@@ -0,0 +1,47 @@
+"""Optional Numba kernels for the optimizer's O(n^2) precomputation."""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, cache=True, nogil=True)
+    def bpm_energy_compat(
+        bpms: np.ndarray,
+        energies: np.ndarray,
+        tolerance: float,
+        allow_halftime: bool,
+        enforce_energy_flow: bool,
+    ) -> np.ndarray:
+        """
+        Fused BPM and energy-flow compatibility matrix.
+
+        Produces the same matrix as the NumPy broadcast in the optimizer (the float
+        expressions of bpm_compatible), but in a single pass per row without n x n
+        temporaries, with rows split across threads.
+        """
+        n = bpms.shape[0]
+        compat = np.zeros((n, n), dtype=np.bool_)
+        for i in prange(n):
+            a = bpms[i]
+            for j in range(n):
+                if i == j:
+                    continue
+                if enforce_energy_flow:
+                    step = energies[j] - energies[i]
+                    if step < 0 or step > 1:
+                        continue
+                b = bpms[j]
+                direct = abs(a - b) <= tolerance
+                halftime = allow_halftime and (
+                    abs(a - b * 0.5) <= tolerance or abs(a - b * 2.0) <= tolerance
+                )
+                compat[i, j] = direct or halftime
+        return compat
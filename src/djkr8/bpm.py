@@ -1,6 +1,9 @@
 """BPM compatibility checking with halftime/doubletime support."""
 
 import logging
+from collections.abc import Sequence
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -41,12 +44,9 @@ def bpm_compatible(
 
     # Half-time: bpm1 matches half of bpm2
     # Example: 128 BPM matches 64 BPM (128/2 = 64)
-    if abs(bpm1 - bpm2 / 2) <= tolerance:
-        return True
-
     # Double-time: bpm1 matches double of bpm2
     # Example: 75 BPM matches 150 BPM (75*2 = 150)
-    return abs(bpm1 - bpm2 * 2) <= tolerance
+    return abs(bpm1 - bpm2 * 0.5) <= tolerance or abs(bpm1 - bpm2 * 2.0) <= tolerance
 
 
 def get_bpm_difference(bpm1: float, bpm2: float, allow_halftime: bool = True) -> float:
@@ -69,12 +69,38 @@ def get_bpm_difference(bpm1: float, bpm2: float, allow_halftime: bool = True) ->
         >>> get_bpm_difference(140, 68)
         2.0
     """
-    direct = abs(bpm1 - bpm2)
-
     if not allow_halftime:
-        return direct
+        return abs(bpm1 - bpm2)
+
+    # Direct, half-time and double-time distances in one expression
+    return min(abs(bpm1 - bpm2), abs(bpm1 - bpm2 * 0.5), abs(bpm1 - bpm2 * 2.0))
+
+
+def bpm_compat_matrix(
+    bpms: Sequence[float] | np.ndarray, tolerance: float = 10.0, allow_halftime: bool = True
+) -> np.ndarray:
+    """
+    Check every pair of BPMs at once.
 
-    half = abs(bpm1 - bpm2 / 2)
-    double = abs(bpm1 - bpm2 * 2)
+    Batch form of bpm_compatible: entry [i, j] equals bpm_compatible(bpms[i], bpms[j],
+    tolerance, allow_halftime), computed with NumPy broadcasting instead of n^2 calls.
 
-    return min(direct, half, double)
+    Args:
+        bpms: BPMs to compare
+        tolerance: Maximum BPM difference allowed (default: 10)
+        allow_halftime: Also check half-time and double-time ratios (default: True)
+
+    Returns:
+        Boolean n x n matrix (the diagonal is True)
+
+    Examples:
+        >>> bpm_compat_matrix([128, 64, 100]).tolist()
+        [[True, True, False], [True, True, False], [False, False, True]]
+    """
+    values = np.asarray(bpms, dtype=np.float64)
+    bpm_from, bpm_to = values[:, None], values[None, :]
+    compat = np.abs(bpm_from - bpm_to) <= tolerance
+    if allow_halftime:
+        compat |= np.abs(bpm_from - bpm_to * 0.5) <= tolerance
+        compat |= np.abs(bpm_from - bpm_to * 2.0) <= tolerance
+    return compat
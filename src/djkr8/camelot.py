@@ -1,19 +1,37 @@
 """Camelot wheel harmonic compatibility checking."""
 
 import logging
+from functools import lru_cache
+
+import numpy as np
 
 from djkr8.models import HarmonicLevel, TransitionType
 
 logger = logging.getLogger(__name__)
 
+# All 24 Camelot keys in wheel order (1A, 1B, 2A, ..., 12B)
+CAMELOT_KEYS: tuple[str, ...] = tuple(
+    f"{hour}{letter}" for hour in range(1, 13) for letter in ("A", "B")
+)
+CAMELOT_INDEX: dict[str, int] = {key: i for i, key in enumerate(CAMELOT_KEYS)}
+
+# Circular distance between hours, indexed as _HOUR_DIST[(hour1 - 1) * 12 + (hour2 - 1)]
+_HOUR_DIST = bytes(min(abs(a - b), 12 - abs(a - b)) for a in range(12) for b in range(12))
+
 
 def get_transition_quality(key1: str, key2: str) -> tuple[float, TransitionType]:
-    try:
-        hour1, letter1 = parse_camelot_key(key1)
-        hour2, letter2 = parse_camelot_key(key2)
-    except ValueError:
+    idx1 = camelot_index(key1)
+    idx2 = camelot_index(key2)
+    if idx1 < 0 or idx2 < 0:
         return (0.0, TransitionType.VIOLATION)
 
+    return _TRANSITION_TABLE[idx1 * 24 + idx2]
+
+
+def _transition_rule(
+    hour1: int, letter1: str, hour2: int, letter2: str
+) -> tuple[float, TransitionType]:
+    """Transition quality rules behind the precomputed transition table."""
     hour_dist = get_hour_distance(hour1, hour2)
     same_letter = letter1 == letter2
 
@@ -42,12 +60,16 @@ def get_transition_quality(key1: str, key2: str) -> tuple[float, TransitionType]
 
 
 def is_energy_boost(key1: str, key2: str) -> bool:
-    try:
-        hour1, letter1 = parse_camelot_key(key1)
-        hour2, letter2 = parse_camelot_key(key2)
-    except ValueError:
+    idx1 = camelot_index(key1)
+    idx2 = camelot_index(key2)
+    if idx1 < 0 or idx2 < 0:
         return False
 
+    return bool(_ENERGY_BOOST_TABLE[idx1 * 24 + idx2])
+
+
+def _energy_boost_rule(hour1: int, letter1: str, hour2: int, letter2: str) -> bool:
+    """Energy boost rules behind the precomputed energy boost table."""
     hour_dist = get_hour_distance(hour1, hour2)
     same_letter = letter1 == letter2
 
@@ -76,25 +98,34 @@ def parse_camelot_key(key: str) -> tuple[int, str]:
         >>> parse_camelot_key("12B")
         (12, 'B')
     """
+    parsed = _parse_cached(key)
+    if isinstance(parsed, str):
+        raise ValueError(parsed)
+    return parsed
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(key: str) -> tuple[int, str] | str:
+    """Memoized parse returning (hour, letter), or the error message for an invalid key."""
     key = key.strip().upper()
 
     if len(key) < 2:
         logger.warning(f"Invalid Camelot key format: '{key}'")
-        raise ValueError(f"Invalid Camelot key: '{key}'")
+        return f"Invalid Camelot key: '{key}'"
 
     letter = key[-1]
     hour_str = key[:-1]
 
     if letter not in ("A", "B"):
-        raise ValueError(f"Invalid Camelot key letter: '{letter}' (must be A or B)")
+        return f"Invalid Camelot key letter: '{letter}' (must be A or B)"
 
     try:
         hour = int(hour_str)
-    except ValueError as err:
-        raise ValueError(f"Invalid Camelot key hour: '{hour_str}'") from err
+    except ValueError:
+        return f"Invalid Camelot key hour: '{hour_str}'"
 
     if not (1 <= hour <= 12):
-        raise ValueError(f"Camelot hour must be 1-12, got: {hour}")
+        return f"Camelot hour must be 1-12, got: {hour}"
 
     return hour, letter
 
@@ -111,6 +142,9 @@ def get_hour_distance(hour1: int, hour2: int) -> int:
         >>> get_hour_distance(1, 7)
         6
     """
+    if 1 <= hour1 <= 12 and 1 <= hour2 <= 12:
+        return _HOUR_DIST[(hour1 - 1) * 12 + (hour2 - 1)]
+    # Off the wheel the table index would wrap or overflow, so compute it directly
     diff = abs(hour1 - hour2)
     return min(diff, 12 - diff)
 
@@ -146,12 +180,18 @@ def is_harmonic_compatible(
         >>> is_harmonic_compatible("8A", "9B", HarmonicLevel.STRICT)  # Not strict
         False
     """
-    try:
-        hour1, letter1 = parse_camelot_key(key1)
-        hour2, letter2 = parse_camelot_key(key2)
-    except ValueError:
+    idx1 = camelot_index(key1)
+    idx2 = camelot_index(key2)
+    if idx1 < 0 or idx2 < 0:
         return False
 
+    return bool(_HARMONIC_TABLES[level][idx1 * 24 + idx2])
+
+
+def _harmonic_rule(
+    hour1: int, letter1: str, hour2: int, letter2: str, level: HarmonicLevel
+) -> bool:
+    """Camelot compatibility rules behind the precomputed harmonic tables."""
     hour_dist = get_hour_distance(hour1, hour2)
     same_letter = letter1 == letter2
 
@@ -187,13 +227,64 @@ def get_compatible_keys(key: str, level: HarmonicLevel = HarmonicLevel.STRICT) -
         >>> len(get_compatible_keys("8A", HarmonicLevel.MODERATE))
         6
     """
-    parse_camelot_key(key)
-    compatible = []
+    idx = camelot_index(key)
+    if idx < 0:
+        parse_camelot_key(key)  # raises ValueError with the specific reason
+    return list(_COMPATIBLE_KEYS[level][idx])
+
 
-    for h in range(1, 13):
-        for letter in ["A", "B"]:
-            test_key = f"{h}{letter}"
-            if is_harmonic_compatible(key, test_key, level):
-                compatible.append(test_key)
+def camelot_index(key: str) -> int:
+    """
+    Get the position of a Camelot key in CAMELOT_KEYS, or -1 if the key is invalid.
 
-    return compatible
+    Examples:
+        >>> camelot_index("1A")
+        0
+        >>> camelot_index(" 8b ")
+        15
+        >>> camelot_index("13A")
+        -1
+    """
+    idx = CAMELOT_INDEX.get(key)
+    if idx is not None:
+        return idx
+
+    parsed = _parse_cached(key)
+    if isinstance(parsed, str):
+        return -1
+    return CAMELOT_INDEX[f"{parsed[0]}{parsed[1]}"]
+
+
+# Every (hour, letter) pair of CAMELOT_KEYS, in order, for building the tables below
+_KEY_PARTS: tuple[tuple[int, str], ...] = tuple((int(key[:-1]), key[-1]) for key in CAMELOT_KEYS)
+
+# Flat 24x24 tables indexed as table[idx1 * 24 + idx2]: compatibility per level,
+# transition (quality, type) and energy boost
+_HARMONIC_TABLES: dict[HarmonicLevel, bytes] = {
+    level: bytes(_harmonic_rule(*k1, *k2, level) for k1 in _KEY_PARTS for k2 in _KEY_PARTS)
+    for level in HarmonicLevel
+}
+_TRANSITION_TABLE: tuple[tuple[float, TransitionType], ...] = tuple(
+    _transition_rule(*k1, *k2) for k1 in _KEY_PARTS for k2 in _KEY_PARTS
+)
+_ENERGY_BOOST_TABLE = bytes(_energy_boost_rule(*k1, *k2) for k1 in _KEY_PARTS for k2 in _KEY_PARTS)
+
+# Compatible keys per level and key index, in CAMELOT_KEYS order
+_COMPATIBLE_KEYS: dict[HarmonicLevel, tuple[tuple[str, ...], ...]] = {
+    level: tuple(
+        tuple(key for j, key in enumerate(CAMELOT_KEYS) if table[i * 24 + j]) for i in range(24)
+    )
+    for level, table in _HARMONIC_TABLES.items()
+}
+
+# Pairwise lookup tables over CAMELOT_KEYS, indexed as table[camelot_index(k1), camelot_index(k2)]
+HARMONIC_MATRIX: dict[HarmonicLevel, np.ndarray] = {
+    level: np.frombuffer(table, dtype=np.uint8).reshape(24, 24).astype(bool)
+    for level, table in _HARMONIC_TABLES.items()
+}
+ENERGY_BOOST_MATRIX: np.ndarray = (
+    np.frombuffer(_ENERGY_BOOST_TABLE, dtype=np.uint8).reshape(24, 24).astype(bool)
+)
+TRANSITION_QUALITY_MATRIX: np.ndarray = np.array(
+    [quality for quality, _ in _TRANSITION_TABLE], dtype=np.float64
+).reshape(24, 24)
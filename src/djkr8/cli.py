@@ -8,28 +8,28 @@ from datetime import datetime
 from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 
+import numpy as np
+
 from djkr8 import (
     HarmonicLevel,
     PlaylistOptimizer,
+    SolveMode,
     Track,
 )
 from djkr8.rekordbox import HAS_PYREKORDBOX, RekordboxLoader, write_rekordbox_xml
 
-logger = logging.getLogger(__name__)
+try:
+    import orjson
 
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
-def load_tracks_from_json(filepath: Path) -> list[Track]:
-    """Load tracks from JSON file."""
-    logger.debug(f"Loading tracks from {filepath}")
-    with open(filepath) as f:
-        data = json.load(f)
+logger = logging.getLogger(__name__)
 
-    tracks_data = data.get("tracks", data)
 
-    if not isinstance(tracks_data, list):
-        raise ValueError("JSON must contain a 'tracks' array or be an array of tracks")
-
-    tracks = []
+def _validate_track_items(tracks_data: list) -> None:
+    """Raise a descriptive ValueError for the first malformed track entry."""
     for item in tracks_data:
         if not isinstance(item, dict):
             raise ValueError(f"Each track must be a dictionary, got: {type(item)}")
@@ -39,18 +39,58 @@ def load_tracks_from_json(filepath: Path) -> list[Track]:
         if missing:
             raise ValueError(f"Track missing required fields: {missing}")
 
-        tracks.append(
-            Track(
-                id=item["id"],
-                key=item["key"],
-                bpm=float(item["bpm"]),
-                energy=int(item.get("energy", 5)),
-                duration=float(item.get("duration", 0.0)),
-                path=item.get("path"),
-                title=item.get("title"),
-                artist=item.get("artist"),
+
+def _track_fields_valid(fields: list[tuple]) -> bool:
+    """Check all rows against the Track invariants at once."""
+    count = len(fields)
+    bpms = np.fromiter((row[2] for row in fields), dtype=np.float64, count=count)
+    energies = np.fromiter((row[3] for row in fields), dtype=np.int64, count=count)
+    durations = np.fromiter((row[4] for row in fields), dtype=np.float64, count=count)
+    return (
+        all(row[0] and isinstance(row[1], str) and len(row[1]) >= 2 for row in fields)
+        and not (bpms <= 0).any()
+        and bool(((energies >= 1) & (energies <= 5)).all())
+        and not (durations < 0).any()
+    )
+
+
+def load_tracks_from_json(filepath: Path) -> list[Track]:
+    """Load tracks from JSON file."""
+    logger.debug(f"Loading tracks from {filepath}")
+    raw = Path(filepath).read_bytes()
+    data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+
+    tracks_data = data.get("tracks", data) if isinstance(data, dict) else data
+
+    if not isinstance(tracks_data, list):
+        raise ValueError("JSON must contain a 'tracks' array or be an array of tracks")
+
+    # Build optimistically; only walk the items again to explain a failure
+    try:
+        fields = [
+            (
+                item["id"],
+                item["key"],
+                float(item["bpm"]),
+                int(item.get("energy", 5)),
+                float(item.get("duration", 0.0)),
+                item.get("path"),
+                item.get("title"),
+                item.get("artist"),
             )
-        )
+            for item in tracks_data
+        ]
+    except (KeyError, TypeError):
+        _validate_track_items(tracks_data)
+        raise
+
+    # Validate the whole batch once; on failure, the regular constructor reports which
+    # track is wrong
+    if _track_fields_valid(fields):
+        # Keys come from a 24-value vocabulary, so all tracks share one interned string per key
+        tracks = [Track.unchecked(row[0], sys.intern(row[1]), *row[2:]) for row in fields]
+    else:
+        tracks = [Track(*row) for row in fields]
 
     logger.info(f"Loaded {len(tracks)} tracks from {filepath}")
     return tracks
@@ -165,6 +205,12 @@ Examples:
         help="Solver time limit in seconds (default: 5.0)",
     )
 
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Return the first playlist found instead of searching for the best one",
+    )
+
     parser.add_argument(
         "--max-duration",
         type=float,
@@ -335,6 +381,7 @@ Examples:
         max_playlist_duration=args.max_duration,
         energy_weight=args.energy_weight,
         enforce_energy_flow=not args.allow_energy_drops,
+        mode=SolveMode.FAST if args.fast else SolveMode.OPTIMAL,
     )
 
     print("Optimizing playlist...")
@@ -364,10 +411,15 @@ Examples:
         print(
             f"  BPM range: {stats.bpm_range[0]:.0f}-{stats.bpm_range[1]:.0f} (avg: {stats.avg_bpm:.1f})"
         )
-        total_duration = sum(t.duration for t in result.playlist)
+        count = len(result.playlist)
+        durations = np.fromiter(
+            (t.duration for t in result.playlist), dtype=np.float64, count=count
+        )
+        energies = np.fromiter((t.energy for t in result.playlist), dtype=np.float64, count=count)
+        total_duration = float(durations.sum())
         if total_duration > 0:
             print(f"  Total Duration: {total_duration:.0f}s")
-        avg_energy = sum(t.energy for t in result.playlist) / len(result.playlist)
+        avg_energy = float(energies.mean())
         print(f"  Average Energy: {avg_energy:.1f}")
 
     # Generate playlist name for DB or XML
@@ -3,6 +3,8 @@
 from dataclasses import dataclass, field
 from enum import Enum
 
+import numpy as np
+
 
 class TransitionType(str, Enum):
     SMOOTH = "smooth"
@@ -18,6 +20,18 @@ class SetArcProfile(str, Enum):
     STEADY_STATE = "steady_state"
 
 
+class SolveMode(str, Enum):
+    """
+    How hard the solver works on a playlist.
+
+    - OPTIMAL: Search for the best playlist until proven optimal or the time limit
+    - FAST: Return the first playlist found, under a time limit scaled to the input size
+    """
+
+    OPTIMAL = "optimal"
+    FAST = "fast"
+
+
 class HarmonicLevel(str, Enum):
     """
     Defines which harmonic transitions are considered 'safe' (non-violations).
@@ -32,7 +46,7 @@ class HarmonicLevel(str, Enum):
     RELAXED = "relaxed"
 
 
-@dataclass
+@dataclass(slots=True)
 class Track:
     id: str
     key: str
@@ -56,6 +70,32 @@ class Track:
         if self.duration < 0:
             raise ValueError(f"Duration cannot be negative, got: {self.duration}")
 
+    @classmethod
+    def unchecked(
+        cls,
+        id: str,
+        key: str,
+        bpm: float,
+        energy: int = 5,
+        duration: float = 0.0,
+        path: str | None = None,
+        title: str | None = None,
+        artist: str | None = None,
+        rekordbox_id: int | None = None,
+    ) -> "Track":
+        """Build a track without running __post_init__ (for input validated in bulk)."""
+        track = object.__new__(cls)
+        track.id = id
+        track.key = key
+        track.bpm = bpm
+        track.energy = energy
+        track.duration = duration
+        track.path = path
+        track.title = title
+        track.artist = artist
+        track.rekordbox_id = rekordbox_id
+        return track
+
 
 @dataclass
 class EnergyArc:
@@ -65,7 +105,7 @@ class EnergyArc:
     min_cooldown_duration: int = 2
 
 
-@dataclass
+@dataclass(slots=True)
 class TransitionInfo:
     from_track: Track
     to_track: Track
@@ -76,7 +116,7 @@ class TransitionInfo:
     quality_score: float = 1.0
 
 
-@dataclass
+@dataclass(slots=True)
 class PlaylistStatistics:
     """Statistics about the generated playlist."""
 
@@ -103,7 +143,7 @@ class PlaylistStatistics:
         return (self.harmonic_transitions / total_transitions) * 100
 
 
-@dataclass
+@dataclass(slots=True)
 class PlaylistResult:
     """Result from playlist optimization."""
 
@@ -126,9 +166,11 @@ class PlaylistResult:
         harmonic = sum(1 for t in self.transitions if t.is_harmonic)
         non_harmonic = len(self.transitions) - harmonic
 
-        bpms = [t.bpm for t in self.playlist]
-        avg_bpm = sum(bpms) / len(bpms) if bpms else 0.0
-        bpm_range = (min(bpms), max(bpms)) if bpms else (0.0, 0.0)
+        bpms = np.fromiter(
+            (t.bpm for t in self.playlist), dtype=np.float64, count=len(self.playlist)
+        )
+        avg_bpm = float(bpms.mean())
+        bpm_range = (float(bpms.min()), float(bpms.max()))
 
         self.statistics = PlaylistStatistics(
             total_input_tracks=0,  # Set by optimizer
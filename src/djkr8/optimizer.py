@@ -1,23 +1,232 @@
 """Playlist optimization using Google OR-Tools CP-SAT solver."""
 
 import logging
+import os
+from dataclasses import replace
+from itertools import pairwise
+from typing import Any
 
+import numpy as np
 from ortools.sat.python import cp_model
 
-from djkr8.bpm import bpm_compatible, get_bpm_difference
-from djkr8.camelot import get_transition_quality, is_energy_boost, is_harmonic_compatible
+from djkr8.bpm import bpm_compat_matrix, get_bpm_difference
+from djkr8.camelot import (
+    ENERGY_BOOST_MATRIX,
+    HARMONIC_MATRIX,
+    TRANSITION_QUALITY_MATRIX,
+    camelot_index,
+)
 from djkr8.models import (
     HarmonicLevel,
     PlaylistResult,
     PlaylistStatistics,
     SetArcProfile,
+    SolveMode,
     Track,
     TransitionInfo,
+    TransitionType,
 )
 
 logger = logging.getLogger(__name__)
 
 
+def _key_pair_lookup(table: np.ndarray, key_ids: np.ndarray) -> np.ndarray:
+    """Expand a 24x24 Camelot table to an n x n track matrix (invalid keys map to 0/False)."""
+    valid = key_ids >= 0
+    safe_ids = np.where(valid, key_ids, 0)
+    pair_valid = valid[:, None] & valid[None, :]
+    return np.where(pair_valid, table[safe_ids[:, None], safe_ids[None, :]], 0).astype(table.dtype)
+
+
+# Below this size importing and loading the Numba kernel costs more than it saves
+NUMBA_MIN_TRACKS = 2500
+
+
+def _bpm_energy_compat(
+    bpms: np.ndarray,
+    energies: np.ndarray,
+    tolerance: float,
+    allow_halftime: bool,
+    enforce_energy_flow: bool,
+) -> np.ndarray:
+    """
+    BPM and energy-flow compatibility for every ordered pair of tracks (diagonal False).
+
+    BPMs and the tolerance are compared as exact floats, never rounded, so every entry
+    equals bpm_compatible() for that pair.
+    """
+    if len(bpms) >= NUMBA_MIN_TRACKS:
+        from djkr8 import _numba_kernels
+
+        if _numba_kernels.HAS_NUMBA:
+            return _numba_kernels.bpm_energy_compat(
+                bpms, energies, tolerance, allow_halftime, enforce_energy_flow
+            )
+
+    # NumPy broadcast over the exact float BPMs, with the expressions of bpm_compatible
+    compat = bpm_compat_matrix(bpms, tolerance, allow_halftime)
+    if enforce_energy_flow:
+        energy_step = energies[None, :] - energies[:, None]
+        compat &= (energy_step >= 0) & (energy_step <= 1)
+    np.fill_diagonal(compat, False)
+    return compat
+
+
+def _interchangeable_buckets(
+    tracks: list[Track], key_ids: np.ndarray, pinned: set[int]
+) -> list[list[int]]:
+    """
+    Group tracks the model cannot tell apart (same key, BPM, energy and duration).
+
+    Pinned tracks (start/end/must-include) are never grouped, as swapping them would
+    change the constraints. Only buckets with two or more tracks are returned, each
+    sorted by index.
+    """
+    groups: dict[tuple, list[int]] = {}
+    for i, track in enumerate(tracks):
+        if i in pinned:
+            continue
+        signature = (int(key_ids[i]), track.bpm, track.energy, track.duration)
+        groups.setdefault(signature, []).append(i)
+    return [bucket for bucket in groups.values() if len(bucket) > 1]
+
+
+def _canonicalize_path(path: list[int], buckets: list[list[int]]) -> list[int]:
+    """Relabel interchangeable tracks so each bucket is used lowest-index first, in order."""
+    bucket_of = {node: b for b, bucket in enumerate(buckets) for node in bucket}
+    # One pass over the path collects where each bucket's tracks sit, in path order
+    positions: list[list[int]] = [[] for _ in buckets]
+    for pos, node in enumerate(path):
+        b = bucket_of.get(node)
+        if b is not None:
+            positions[b].append(pos)
+
+    path = list(path)
+    for bucket, bucket_positions in zip(buckets, positions, strict=True):
+        for pos, node in zip(bucket_positions, bucket, strict=False):
+            path[pos] = node
+    return path
+
+
+def _longest_path_bound(edge_mask: np.ndarray, start_idx: int | None, end_idx: int | None) -> int:
+    """
+    Upper bound on the number of tracks in any path along edge_mask.
+
+    A simple path enters each strongly connected component at most once, and the components
+    form a DAG, so the heaviest chain of components (weighted by their size) bounds the path
+    length. With a start or end track, only chains beginning or finishing at it count.
+    """
+    num_nodes = len(edge_mask)
+    rows, cols = np.nonzero(edge_mask)
+    succ = cols.tolist()
+    succ_ptr = np.searchsorted(rows, np.arange(num_nodes + 1)).tolist()
+
+    # Kosaraju, pass 1: iterative DFS recording nodes in order of completion
+    visited = [False] * num_nodes
+    finished = []
+    for root in range(num_nodes):
+        if visited[root]:
+            continue
+        visited[root] = True
+        stack = [(root, succ_ptr[root])]
+        while stack:
+            node, k = stack[-1]
+            if k < succ_ptr[node + 1]:
+                stack[-1] = (node, k + 1)
+                nxt = succ[k]
+                if not visited[nxt]:
+                    visited[nxt] = True
+                    stack.append((nxt, succ_ptr[nxt]))
+            else:
+                stack.pop()
+                finished.append(node)
+
+    # Pass 2 on the reversed graph labels components in topological order
+    by_target = np.argsort(cols, kind="stable")
+    pred = rows[by_target].tolist()
+    pred_ptr = np.searchsorted(cols[by_target], np.arange(num_nodes + 1)).tolist()
+    comp = [-1] * num_nodes
+    num_comps = 0
+    for root in reversed(finished):
+        if comp[root] >= 0:
+            continue
+        comp[root] = num_comps
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for k in range(pred_ptr[node], pred_ptr[node + 1]):
+                if comp[pred[k]] < 0:
+                    comp[pred[k]] = num_comps
+                    stack.append(pred[k])
+        num_comps += 1
+
+    comp_ids = np.array(comp, dtype=np.int64)
+    sizes = np.bincount(comp_ids, minlength=num_comps).tolist()
+    if start_idx is None:
+        best = list(sizes)
+    else:
+        best = [-num_nodes] * num_comps
+        best[comp[start_idx]] = sizes[comp[start_idx]]
+
+    # Relax component edges in order of their source, which is topological
+    comp_from, comp_to = comp_ids[rows], comp_ids[cols]
+    crossing = comp_from != comp_to
+    comp_edges = np.unique(comp_from[crossing] * num_comps + comp_to[crossing])
+    for u, v in zip(*np.divmod(comp_edges, num_comps), strict=True):
+        best[v] = max(best[v], best[u] + sizes[v])
+
+    # Negative when the end cannot be reached from the start at all
+    return max(best[comp[end_idx]] if end_idx is not None else max(best), 0)
+
+
+def _collapse_duplicates(
+    tracks: list[Track], pinned_ids: set[str]
+) -> tuple[list[Track], dict[str, list[Track]]]:
+    """
+    Keep one representative per group of tracks with the same key, BPM and energy.
+
+    BPMs must match exactly, as the model compares exact float BPMs. Pinned tracks and
+    tracks with invalid keys are never collapsed. Returns the representatives in input order
+    and, for each representative's ID, the tracks it stands in for.
+    """
+    representatives: list[Track] = []
+    duplicates: dict[str, list[Track]] = {}
+    first_of: dict[tuple, Track] = {}
+    for track in tracks:
+        key_id = camelot_index(track.key)
+        if track.id in pinned_ids or key_id < 0:
+            representatives.append(track)
+            continue
+        signature = (key_id, track.bpm, track.energy)
+        first = first_of.setdefault(signature, track)
+        if first is track:
+            representatives.append(track)
+        else:
+            duplicates.setdefault(first.id, []).append(track)
+    return representatives, duplicates
+
+
+def _playlist_statistics(
+    playlist: list[Track], transitions: list[TransitionInfo], total_input_tracks: int
+) -> PlaylistStatistics:
+    """Summarize a playlist and its transitions."""
+    harmonic = sum(1 for t in transitions if t.is_harmonic)
+    non_harmonic = len(transitions) - harmonic
+
+    bpms = np.fromiter((t.bpm for t in playlist), dtype=np.float64, count=len(playlist))
+    avg_bpm = float(bpms.mean()) if bpms.size else 0.0
+    bpm_range = (float(bpms.min()), float(bpms.max())) if bpms.size else (0.0, 0.0)
+
+    return PlaylistStatistics(
+        total_input_tracks=total_input_tracks,
+        playlist_length=len(playlist),
+        harmonic_transitions=harmonic,
+        non_harmonic_transitions=non_harmonic,
+        avg_bpm=avg_bpm,
+        bpm_range=bpm_range,
+    )
+
+
 class PlaylistOptimizer:
     """
     Optimizes DJ playlists using constraint programming.
@@ -40,6 +249,13 @@ class PlaylistOptimizer:
         max_energy_boosts: int = 3,
         transition_quality_weight: float = 10.0,
         arc_profile: SetArcProfile = SetArcProfile.NONE,
+        num_workers: int | None = None,
+        warm_start: bool = True,
+        use_redundant_constraints: bool = True,
+        collapse_duplicates: bool = False,
+        mode: SolveMode = SolveMode.OPTIMAL,
+        debug_names: bool = False,
+        solver_params: dict[str, Any] | None = None,
     ):
         self.bpm_tolerance = bpm_tolerance
         self.allow_halftime_bpm = allow_halftime_bpm
@@ -52,6 +268,16 @@ class PlaylistOptimizer:
         self.max_energy_boosts = max_energy_boosts
         self.transition_quality_weight = transition_quality_weight
         self.arc_profile = arc_profile
+        self.num_workers = num_workers
+        self.warm_start = warm_start
+        self.use_redundant_constraints = use_redundant_constraints
+        self.collapse_duplicates = collapse_duplicates
+        self.mode = mode
+        self.debug_names = debug_names
+        # Raw CP-SAT SatParameters overrides, applied on top of the defaults below
+        self.solver_params = dict(solver_params or {})
+        # Track IDs of the last solved playlist, reused as a hint by the next optimize() call
+        self._last_solution: list[str] | None = None
 
     def optimize(
         self,
@@ -101,13 +327,13 @@ class PlaylistOptimizer:
                 return PlaylistResult(playlist=[], solver_status="invalid_input")
             end_idx = id_to_idx[end_track_id]
 
-        must_include_indices = []
-        if must_include_ids:
-            for tid in must_include_ids:
-                if tid not in id_to_idx:
-                    logger.warning(f"Must-include track {tid} not found, skipping")
-                else:
-                    must_include_indices.append(id_to_idx[tid])
+        # Deduplicated but order-preserving: the order feeds the search strategy, and a set's
+        # iteration order would change with string hashing between runs
+        must_ids = list(dict.fromkeys(must_include_ids or ()))
+        missing_ids = [tid for tid in must_ids if tid not in id_to_idx]
+        if missing_ids:
+            logger.warning(f"Must-include tracks not found, skipping: {', '.join(missing_ids)}")
+        must_include_indices = [id_to_idx[tid] for tid in must_ids if tid in id_to_idx]
 
         if len(tracks) == 1:
             # Trivial case logic...
@@ -129,6 +355,25 @@ class PlaylistOptimizer:
                 ),
             )
 
+        # Opt-in heuristic: tracks with the same key, BPM and energy are folded into one node
+        # whose copies are played back to back (a same-key transition, always allowed). This
+        # shrinks the model, but can miss playlists that use a copy elsewhere as a bridge.
+        num_input_tracks = len(tracks)
+        duplicates: dict[str, list[Track]] = {}
+        if self.collapse_duplicates:
+            if target_length is not None or self.max_playlist_duration is not None:
+                logger.debug("Not collapsing duplicates: length and duration limits are per track")
+            else:
+                pinned_ids = {tracks[i].id for i in must_include_indices}
+                pinned_ids.update(tid for tid in (start_track_id, end_track_id) if tid)
+                tracks, duplicates = _collapse_duplicates(tracks, pinned_ids)
+                if duplicates:
+                    logger.debug(f"Collapsed duplicates into {len(tracks)} distinct tracks")
+                    id_to_idx = {t.id: i for i, t in enumerate(tracks)}
+                    start_idx = id_to_idx[start_track_id] if start_track_id else None
+                    end_idx = id_to_idx[end_track_id] if end_track_id else None
+                    must_include_indices = [id_to_idx[tid] for tid in must_ids if tid in id_to_idx]
+
         model = cp_model.CpModel()
         num_tracks = len(tracks)
 
@@ -137,137 +382,155 @@ class PlaylistOptimizer:
         dummy_idx = num_tracks
         total_nodes = num_tracks + 1
 
-        # Variables for all nodes (tracks + dummy)
-        included = [model.new_bool_var(f"inc_{i}") for i in range(total_nodes)]
-
-        # Force dummy to be included
-        model.add(included[dummy_idx] == 1)
-
-        edge_vars = {}
-
-        def is_energy_flow_valid(i: int, j: int) -> bool:
-            return j >= i and j - i <= 1
+        # Variables for real tracks only. The dummy has no self-loop arc, so the circuit
+        # always passes through it and it needs no inclusion literal of its own.
+        # Formatting a name per variable is measurable on large models, so names are opt-in
+        if self.debug_names:
+            included = [model.new_bool_var(f"inc_{i}") for i in range(num_tracks)]
+        else:
+            included = [model.new_bool_var("") for _ in range(num_tracks)]
 
         # 1. Edges between real tracks
-        for i in range(num_tracks):
-            for j in range(num_tracks):
-                # Constraints:
-                # 1. Different tracks
-                # 2. BPM compatible
-                # 3. Energy flow valid (non-decreasing, max +1) if enforced
-                if (
-                    i != j
-                    and bpm_compatible(
-                        tracks[i].bpm,
-                        tracks[j].bpm,
-                        self.bpm_tolerance,
-                        self.allow_halftime_bpm,
-                    )
-                    and (
-                        not self.enforce_energy_flow
-                        or is_energy_flow_valid(tracks[i].energy, tracks[j].energy)
-                    )
-                ):
-                    edge_vars[(i, j)] = model.new_bool_var(f"edge_{i}_{j}")
+        # All pairwise relationships come from one vectorized pass over the tracks
+        compat, key_ids, harmonic, boost, quality = self._build_compat_matrices(tracks)
+
+        # Symmetry breaking: tracks in a bucket are interchangeable, so any solution can be
+        # relabelled to use the lowest indices first and visit them in index order. This
+        # drops the backward edges inside each bucket and orders their inclusion literals.
+        pinned = set(must_include_indices)
+        pinned.update(idx for idx in (start_idx, end_idx) if idx is not None)
+        buckets = _interchangeable_buckets(tracks, key_ids, pinned)
+        edge_mask = compat.copy()
+        for bucket in buckets:
+            members = np.array(bucket)
+            edge_mask[np.ix_(members, members)] &= np.triu(np.ones((len(bucket),) * 2, dtype=bool))
+            for prev, nxt in pairwise(bucket):
+                model.add_implication(included[nxt], included[prev])
+        if buckets:
+            logger.debug(f"Symmetry breaking over {len(buckets)} buckets of interchangeable tracks")
+
+        # If max_violation_pct is 0.0, we want strict 0 violations.
+        # If max_violation_pct > 0.0 (e.g. 0.1), we usually want at least 1 allowed
+        # for small playlists (e.g. 5 tracks * 0.1 = 0.5 -> 0 would be too strict).
+        max_violations = int(num_input_tracks * self.max_violation_pct)
+        if self.max_violation_pct > 0 and max_violations == 0:
+            max_violations = 1
+
+        # Edges the budgets rule out entirely are never created
+        if max_violations == 0:
+            edge_mask &= harmonic | boost
+        if self.max_energy_boosts <= 0:
+            edge_mask &= ~boost
+
+        # Tracks without a single usable edge can only ever form a one-track playlist.
+        # They are left out of the circuit and compared against the solution afterwards.
+        isolated = ~(edge_mask.any(axis=0) | edge_mask.any(axis=1))
+        isolated[list(pinned)] = False
+        isolated_indices = np.flatnonzero(isolated).tolist()
+        for i in isolated_indices:
+            model.add(included[i] == 0)
+        if isolated_indices:
+            logger.debug(f"Pruned {len(isolated_indices)} tracks with no compatible neighbors")
+
+        # Without this check CP-SAT can spend its whole time limit failing to prove that a
+        # target length is out of reach (e.g. energy flow with a missing energy level)
+        if target_length is not None:
+            reachable = _longest_path_bound(edge_mask, start_idx, end_idx)
+            if reachable < min(target_length, num_tracks):
+                logger.warning(
+                    f"Target length {target_length} is unreachable: "
+                    f"no path through these tracks is longer than {reachable}"
+                )
+                return PlaylistResult(playlist=[], solver_status="infeasible_target_length")
+
+        # Track-to-track edges are stored as parallel arrays (edge k runs from edge_rows[k]
+        # to edge_cols[k] with variable edge_vars[k]) rather than a dict keyed by pairs, so
+        # later passes index them with NumPy and never filter dummy edges back out
+        edge_rows, edge_cols = np.nonzero(edge_mask)
+        edge_pairs = list(zip(edge_rows.tolist(), edge_cols.tolist(), strict=True))
+        if self.debug_names:
+            edge_vars = [model.new_bool_var(f"edge_{i}_{j}") for i, j in edge_pairs]
+        else:
+            edge_vars = [model.new_bool_var("") for _ in edge_pairs]
 
         # 2. Edges to/from dummy node (allow entering/leaving the playlist anywhere)
-        for i in range(num_tracks):
-            # Dummy -> i (Start of playlist)
-            edge_vars[(dummy_idx, i)] = model.new_bool_var(f"start_at_{i}")
-            # i -> Dummy (End of playlist)
-            edge_vars[(i, dummy_idx)] = model.new_bool_var(f"end_at_{i}")
+        active = np.flatnonzero(~isolated).tolist()
+        # Dummy -> i (Start of playlist)
+        start_vars = {i: model.new_bool_var(f"start_at_{i}") for i in active}
+        # i -> Dummy (End of playlist)
+        end_vars = {i: model.new_bool_var(f"end_at_{i}") for i in active}
 
-        logger.debug(f"Created {len(edge_vars)} edges for {total_nodes} nodes")
+        logger.debug(f"Created {len(edge_vars) + 2 * len(active)} edges for {total_nodes} nodes")
 
-        arcs = [(i, j, var) for (i, j), var in edge_vars.items()]
+        arcs = [(i, j, var) for (i, j), var in zip(edge_pairs, edge_vars, strict=True)]
+        arcs += [(dummy_idx, i, var) for i, var in start_vars.items()]
+        arcs += [(i, dummy_idx, var) for i, var in end_vars.items()]
 
-        # Add self-loops for excluded nodes (standard TSP/circuit pattern)
-        for i in range(total_nodes):
-            arcs.append((i, i, included[i].Not()))
+        # Add self-loops for excluded tracks (standard TSP/circuit pattern)
+        self_loops = [(i, i, included[i].Not()) for i in range(num_tracks)]
 
-        model.add_circuit(arcs)
+        model.add_circuit(arcs + self_loops)
 
         # --- Constraints ---
 
         # Start Track constraint
         if start_idx is not None:
             # Force Dummy -> StartTrack
-            if (dummy_idx, start_idx) in edge_vars:
-                model.add(edge_vars[(dummy_idx, start_idx)] == 1)
-            else:
-                # Impossible start (e.g. if we had BPM constraints on start, but dummy has none)
-                model.add(included[dummy_idx] == 0)  # Force fail
+            model.add(start_vars[start_idx] == 1)
 
         # End Track constraint
         if end_idx is not None:
             # Force EndTrack -> Dummy
-            if (end_idx, dummy_idx) in edge_vars:
-                model.add(edge_vars[(end_idx, dummy_idx)] == 1)
-            else:
-                model.add(included[dummy_idx] == 0)
+            model.add(end_vars[end_idx] == 1)
+
+        # Redundant path-shape constraints: the circuit already implies them, but stating them
+        # linearly gives the LP relaxation a tighter bound on the path length
+        if self.use_redundant_constraints:
+            # The dummy has no self-loop, so the path always has exactly one start and end
+            model.add_exactly_one(start_vars.values())
+            model.add_exactly_one(end_vars.values())
+            # A path through k tracks uses k - 1 track-to-track edges
+            model.add(cp_model.LinearExpr.sum(included) == cp_model.LinearExpr.sum(edge_vars) + 1)
 
         # Must Include constraints (Soft: High Objective Weight)
         # We handle this in the objective function below.
 
         # Target Length constraint
         if target_length is not None:
-            # sum(included) includes dummy, so we want target_length + 1
             # Cap at total tracks available
             target = min(target_length, num_tracks)
-            model.add(sum(included) == target + 1)
+            model.add(cp_model.LinearExpr.sum(included) == target)
 
         # Harmonic violations and energy boosts (only for track-track edges, not dummy edges)
-        violation_vars = {}
-        boost_vars = {}
-        quality_scores = {}
-
-        for (i, j), edge_var in edge_vars.items():
-            if i == dummy_idx or j == dummy_idx:
-                continue
-
-            quality, _ = get_transition_quality(tracks[i].key, tracks[j].key)
-            quality_scores[(i, j)] = quality
-
-            is_boost = is_energy_boost(tracks[i].key, tracks[j].key)
-            if is_boost:
-                boost_var = model.new_bool_var(f"boost_{i}_{j}")
-                model.add(edge_var == 1).only_enforce_if(boost_var)
-                model.add(edge_var == 0).only_enforce_if(boost_var.Not())
-                boost_vars[(i, j)] = boost_var
-            elif not is_harmonic_compatible(tracks[i].key, tracks[j].key, self.harmonic_level):
-                violation = model.new_bool_var(f"viol_{i}_{j}")
-                model.add(edge_var == 1).only_enforce_if(violation)
-                model.add(edge_var == 0).only_enforce_if(violation.Not())
-                violation_vars[(i, j)] = violation
-
-        if boost_vars:
-            model.add(sum(boost_vars.values()) <= self.max_energy_boosts)
+        # A boost or violation is taken exactly when its edge is, so both budgets are counted
+        # directly through the edge variables with no indicator variables of their own
+        edge_is_boost = boost[edge_rows, edge_cols]
+        boost_edges = np.flatnonzero(edge_is_boost).tolist()
+        violation_edges = np.flatnonzero(~edge_is_boost & ~harmonic[edge_rows, edge_cols]).tolist()
+
+        if boost_edges:
+            boost_vars = [edge_vars[k] for k in boost_edges]
+            model.add(cp_model.LinearExpr.sum(boost_vars) <= self.max_energy_boosts)
             logger.debug(
-                f"Found {len(boost_vars)} energy boost edges, max allowed: {self.max_energy_boosts}"
+                f"Found {len(boost_edges)} energy boost edges, max allowed: {self.max_energy_boosts}"
             )
 
         # Max violations constraint
-        if violation_vars:
-            # Calculate max violations
-            # If max_violation_pct is 0.0, we want strict 0 violations.
-            # If max_violation_pct > 0.0 (e.g. 0.1), we usually want at least 1 allowed
-            # for small playlists (e.g. 5 tracks * 0.1 = 0.5 -> 0 would be too strict).
-            limit = int(num_tracks * self.max_violation_pct)
-            if self.max_violation_pct > 0 and limit == 0:
-                limit = 1
-
-            max_violations = limit
-            model.add(sum(violation_vars.values()) <= max_violations)
+        if violation_edges:
+            violation_vars = [edge_vars[k] for k in violation_edges]
+            model.add(cp_model.LinearExpr.sum(violation_vars) <= max_violations)
             logger.debug(
-                f"Found {len(violation_vars)} non-harmonic edges, max allowed: {max_violations}"
+                f"Found {len(violation_edges)} non-harmonic edges, max allowed: {max_violations}"
             )
 
         # Duration constraint (ignore dummy)
         if self.max_playlist_duration is not None:
             precision = 100
-            # tracks[i].duration for i < num_tracks
-            total_duration_scaled = sum(
-                int(tracks[i].duration * precision) * included[i] for i in range(num_tracks)
+            durations_int = np.rint(
+                np.array([t.duration for t in tracks], dtype=np.float64) * precision
+            ).astype(np.int64)
+            total_duration_scaled = cp_model.LinearExpr.weighted_sum(
+                included, durations_int.tolist()
             )
             model.add(total_duration_scaled <= int(self.max_playlist_duration * precision))
 
@@ -279,53 +542,152 @@ class PlaylistOptimizer:
         # 100,000 ensures it's more valuable than adding 1000 regular tracks
         must_include_weight = 100000
 
-        objective_terms = []
-
+        # Per-track and per-edge weights are computed as arrays and passed as one weighted sum
+        track_weights = np.full(num_tracks, base_weight, dtype=np.int64)
+        if self.energy_weight > 0:
+            energies = np.array([t.energy for t in tracks], dtype=np.int64)
+            track_weights += (self.energy_weight * energies).astype(np.int64)
+        if duplicates:
+            # A collapsed node stands for all its copies and the same-key transitions between them
+            copies = np.zeros(num_tracks, dtype=np.int64)
+            for rep_id, extra in duplicates.items():
+                copies[id_to_idx[rep_id]] = len(extra)
+            same_key_weights = (self.transition_quality_weight * np.diagonal(quality) * 100).astype(
+                np.int64
+            )
+            track_weights += copies * (track_weights + same_key_weights)
+        track_weights[must_include_indices] += must_include_weight
+
+        edge_weights = (
+            self.transition_quality_weight * quality[edge_rows, edge_cols] * 100
+        ).astype(np.int64)
+
+        objective_vars = included + edge_vars
+        objective_weights = track_weights.tolist() + edge_weights.tolist()
+        model.maximize(cp_model.LinearExpr.weighted_sum(objective_vars, objective_weights))
+
+        # --- Warm start ---
+        # Seed CP-SAT with a greedy playlist so it starts from a feasible-looking incumbent
+        hint_path = self._greedy_path(
+            compat,
+            harmonic,
+            boost,
+            quality,
+            tracks,
+            start_idx,
+            target_length,
+            max_violations,
+            end_idx=end_idx,
+            must_include_indices=must_include_indices,
+        )
+        # Re-optimizing the same library: the previous playlist is often the better seed
+        previous_path = (
+            self._previous_path(id_to_idx, compat, start_idx, target_length)
+            if self.warm_start
+            else []
+        )
+        if previous_path and end_idx is not None and previous_path[-1] != end_idx:
+            previous_path = []
+        if len(previous_path) > len(hint_path):
+            logger.debug(f"Reusing {len(previous_path)} tracks of the previous solution as hint")
+            hint_path = previous_path
+        hint_path = _canonicalize_path(hint_path, buckets)
+        # Successor of each node on the hinted circuit (-1 = not on it)
+        hint_next = np.full(total_nodes, -1, dtype=np.int64)
+        hint_next[[dummy_idx, *hint_path]] = [*hint_path, dummy_idx]
+        successors = hint_next.tolist()
+        edge_hints = (hint_next[edge_rows] == edge_cols).tolist()
         for i in range(num_tracks):
-            weight = base_weight
-
-            if self.energy_weight > 0:
-                weight += int(self.energy_weight * tracks[i].energy)
-
-            if i in must_include_indices:
-                weight += must_include_weight
-
-            objective_terms.append(weight * included[i])
-
-        for (i, j), edge_var in edge_vars.items():
-            if i == dummy_idx or j == dummy_idx:
-                continue
-
-            if (i, j) in quality_scores:
-                quality_bonus = int(self.transition_quality_weight * quality_scores[(i, j)] * 100)
-                objective_terms.append(quality_bonus * edge_var)
-
-        model.maximize(sum(objective_terms))
-
+            model.add_hint(included[i], successors[i] >= 0)
+        for edge_var, hint in zip(edge_vars, edge_hints, strict=True):
+            model.add_hint(edge_var, hint)
+        for i, start_var in start_vars.items():
+            model.add_hint(start_var, successors[dummy_idx] == i)
+        for i, end_var in end_vars.items():
+            model.add_hint(end_var, successors[i] == dummy_idx)
+        logger.debug(f"Warm start hint: {len(hint_path)} tracks")
+
+        # Branch on inclusion first (required tracks, then the rest) and try "in" before "out",
+        # so search dives toward long playlists instead of discovering the objective slowly
+        required = set(must_include_indices)
+        branch_order = [*must_include_indices, *(i for i in range(num_tracks) if i not in required)]
+        model.add_decision_strategy(
+            [included[i] for i in branch_order], cp_model.CHOOSE_FIRST, cp_model.SELECT_MAX_VALUE
+        )
         logger.info("Starting CP-SAT solver")
         solver = cp_model.CpSolver()
         solver.parameters.max_time_in_seconds = self.time_limit_seconds
+        if self.mode == SolveMode.FAST:
+            # Take the first playlist found, with a budget that grows with the input size
+            solver.parameters.max_time_in_seconds = min(
+                self.time_limit_seconds, 0.05 + 0.001 * num_tracks**1.5
+            )
+            solver.parameters.stop_after_first_solution = True
         solver.parameters.log_search_progress = False
+        # Run the CP-SAT portfolio (LNS, LP-based and fixed-search workers) in parallel.
+        # Parallel workers race each other, so only num_workers=1 gives the same playlist on
+        # every run (as long as the search finishes within the time limit).
+        solver.parameters.num_workers = self.num_workers or os.cpu_count() or 8
+        solver.parameters.linearization_level = 2
+        # Interchangeable tracks make the circuit highly symmetric; keep symmetry detection
+        # in presolve and search pinned on even if CP-SAT's default changes
+        solver.parameters.symmetry_level = 2
+        solver.parameters.cp_model_presolve = True
+        # Probing barely tightens this model but costs ~20% of the solve time on 60-200 track
+        # libraries (measured with scripts/tune_cpsat.py); level 1 keeps the cheap part
+        solver.parameters.cp_model_probing_level = 1
+        for name, value in self.solver_params.items():
+            setattr(solver.parameters, name, value)
 
         status = solver.solve(model)
 
         logger.info(f"Solver finished: {solver.status_name(status)} in {solver.wall_time:.2f}s")
 
+        # A pruned track on its own can still beat the circuit (or be the only option)
+        singleton_idx = self._best_singleton(
+            tracks, track_weights, isolated_indices, start_idx, end_idx, target_length
+        )
+        if singleton_idx is not None:
+            solved = status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+            singleton_value = int(track_weights[singleton_idx])
+            if not solved or singleton_value > solver.objective_value:
+                logger.info(f"Single pruned track {tracks[singleton_idx].id} is the best playlist")
+                proven = status in [cp_model.OPTIMAL, cp_model.INFEASIBLE]
+                result = PlaylistResult(
+                    playlist=[tracks[singleton_idx]],
+                    statistics=PlaylistStatistics(
+                        total_input_tracks=num_tracks,
+                        playlist_length=1,
+                        harmonic_transitions=0,
+                        non_harmonic_transitions=0,
+                        avg_bpm=tracks[singleton_idx].bpm,
+                        bpm_range=(tracks[singleton_idx].bpm, tracks[singleton_idx].bpm),
+                    ),
+                    solver_status="optimal" if proven else "feasible",
+                    solver_time_seconds=solver.wall_time,
+                )
+                if duplicates:
+                    result = self._expand_duplicates(result, duplicates, num_input_tracks)
+                return result
+
         if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
             result = self._extract_result(
                 solver,
                 tracks,
                 included,
-                edge_vars,
-                violation_vars,
-                boost_vars,
-                quality_scores,
+                arcs,
+                harmonic,
+                boost,
+                quality,
                 status,
                 dummy_idx,
             )
+            if duplicates:
+                result = self._expand_duplicates(result, duplicates, num_input_tracks)
+            self._last_solution = [t.id for t in result.playlist]
             if result.statistics:
                 logger.info(
-                    f"Optimized playlist: {result.statistics.playlist_length}/{len(tracks)} tracks "
+                    f"Optimized playlist: {result.statistics.playlist_length}/{num_input_tracks} tracks "
                     f"({result.statistics.coverage_pct:.1f}% coverage), "
                     f"{result.statistics.harmonic_pct:.1f}% harmonic transitions"
                 )
@@ -338,15 +700,246 @@ class PlaylistOptimizer:
                 solver_time_seconds=solver.wall_time,
             )
 
+    def clear_warm_start(self):
+        """Forget the last solution so the next optimize() call is seeded from scratch."""
+        self._last_solution = None
+
+    def _build_compat_matrices(
+        self, tracks: list[Track]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute every pairwise track relationship the model needs as n x n arrays.
+
+        Returns:
+            (compat, key_ids, harmonic, boost, quality): compat marks ordered pairs that
+            are BPM compatible (direct, or halftime/doubletime if allowed) and respect
+            the energy flow if enforced, diagonal False. key_ids are the Camelot table
+            indices (-1 for invalid keys). harmonic, boost and quality are looked up from
+            the precomputed Camelot tables, so no key is parsed per pair.
+        """
+        bpms = np.array([t.bpm for t in tracks], dtype=np.float64)
+        energies = np.array([t.energy for t in tracks], dtype=np.int64)
+        compat = _bpm_energy_compat(
+            bpms, energies, self.bpm_tolerance, self.allow_halftime_bpm, self.enforce_energy_flow
+        )
+
+        key_ids = np.array([camelot_index(t.key) for t in tracks], dtype=np.int64)
+        harmonic = _key_pair_lookup(HARMONIC_MATRIX[self.harmonic_level], key_ids)
+        boost = _key_pair_lookup(ENERGY_BOOST_MATRIX, key_ids)
+        quality = _key_pair_lookup(TRANSITION_QUALITY_MATRIX, key_ids)
+        return compat, key_ids, harmonic, boost, quality
+
+    def _best_singleton(
+        self,
+        tracks: list[Track],
+        track_weights: np.ndarray,
+        candidates: list[int],
+        start_idx: int | None,
+        end_idx: int | None,
+        target_length: int | None,
+    ) -> int | None:
+        """Pick the highest-value track that would be a valid playlist on its own."""
+        if start_idx is not None or end_idx is not None:
+            return None
+        if target_length is not None and min(target_length, len(tracks)) != 1:
+            return None
+
+        best_idx = None
+        for i in candidates:
+            if (
+                self.max_playlist_duration is not None
+                and tracks[i].duration > self.max_playlist_duration
+            ):
+                continue
+            if best_idx is None or (track_weights[i], tracks[i].energy) > (
+                track_weights[best_idx],
+                tracks[best_idx].energy,
+            ):
+                best_idx = i
+        return best_idx
+
+    def _expand_duplicates(
+        self,
+        result: PlaylistResult,
+        duplicates: dict[str, list[Track]],
+        num_input_tracks: int,
+    ) -> PlaylistResult:
+        """Put the copies of each collapsed track back right after it in the playlist."""
+        playlist: list[Track] = []
+        transitions: list[TransitionInfo] = []
+        for pos, track in enumerate(result.playlist):
+            if pos > 0:
+                # The transition into this track now starts from the previous track's last copy
+                transitions.append(replace(result.transitions[pos - 1], from_track=playlist[-1]))
+            playlist.append(track)
+            key_id = camelot_index(track.key)
+            for copy in duplicates.get(track.id, ()):
+                transitions.append(
+                    TransitionInfo(
+                        from_track=playlist[-1],
+                        to_track=copy,
+                        is_harmonic=True,
+                        is_bpm_compatible=True,
+                        bpm_difference=get_bpm_difference(
+                            playlist[-1].bpm, copy.bpm, self.allow_halftime_bpm
+                        ),
+                        transition_type=TransitionType.SMOOTH,
+                        quality_score=float(TRANSITION_QUALITY_MATRIX[key_id, key_id]),
+                    )
+                )
+                playlist.append(copy)
+
+        return PlaylistResult(
+            playlist=playlist,
+            transitions=transitions,
+            statistics=_playlist_statistics(playlist, transitions, num_input_tracks),
+            solver_status=result.solver_status,
+            solver_time_seconds=result.solver_time_seconds,
+        )
+
+    def _previous_path(
+        self,
+        id_to_idx: dict[str, int],
+        compat: np.ndarray,
+        start_idx: int | None,
+        target_length: int | None,
+    ) -> list[int]:
+        """
+        Map the last solved playlist onto the current tracks.
+
+        Tracks that are no longer present are dropped, and the path is cut at the first
+        transition the current settings no longer allow, so what remains is a valid prefix.
+        """
+        if not self._last_solution:
+            return []
+
+        path = [id_to_idx[tid] for tid in self._last_solution if tid in id_to_idx]
+        if not path or (start_idx is not None and path[0] != start_idx):
+            return []
+
+        for pos, (prev, nxt) in enumerate(pairwise(path), start=1):
+            if not compat[prev, nxt]:
+                path = path[:pos]
+                break
+        if target_length is not None:
+            path = path[:target_length]
+        return path
+
+    def _greedy_path(
+        self,
+        compat: np.ndarray,
+        harmonic: np.ndarray,
+        boost: np.ndarray,
+        quality: np.ndarray,
+        tracks: list[Track],
+        start_idx: int | None,
+        target_length: int | None,
+        max_violations: int,
+        end_idx: int | None = None,
+        must_include_indices: list[int] | None = None,
+    ) -> list[int]:
+        """
+        Build a playlist greedily by always moving to the best unvisited compatible track.
+
+        Harmonic transitions are preferred over energy boosts, which are preferred over
+        violations; boosts and violations are only taken while their budgets last.
+        Must-include tracks are picked ahead of anything else whenever they are reachable.
+        With only an end track the path is grown backwards from it; with both ends fixed the
+        end track is held back and appended last, backtracking until it fits.
+        """
+        num_tracks = len(tracks)
+        max_length = num_tracks if target_length is None else min(target_length, num_tracks)
+        durations = np.array([t.duration for t in tracks], dtype=np.float64)
+        max_duration = self.max_playlist_duration
+
+        # Smooth transitions score in [2, 3], boosts in [1, 2], violations in [0, 1]
+        score = quality + np.where(boost, 1.0, np.where(harmonic, 2.0, 0.0))
+        if must_include_indices:
+            score[:, must_include_indices] += 3.0
+
+        if start_idx is None and end_idx is not None:
+            # Only the end is fixed: walk backwards from it over the reversed transitions
+            reversed_path = self._greedy_path(
+                compat.T,
+                harmonic.T,
+                boost.T,
+                quality.T,
+                tracks,
+                end_idx,
+                target_length,
+                max_violations,
+                must_include_indices=must_include_indices,
+            )
+            return reversed_path[::-1]
+        if start_idx is None:
+            # Start from the best-connected track to leave room for a long path
+            start_idx = int(np.argmax(compat.sum(axis=1)))
+        if end_idx == start_idx:
+            return [start_idx]
+
+        path = [start_idx]
+        visited = np.zeros(num_tracks, dtype=bool)
+        visited[start_idx] = True
+        total_duration = durations[start_idx]
+        if end_idx is not None:
+            # Reserve the last slot (and its duration) for the end track
+            visited[end_idx] = True
+            total_duration += durations[end_idx]
+            max_length -= 1
+        boosts_left = self.max_energy_boosts
+        violations_left = max_violations
+
+        while len(path) < max_length:
+            current = path[-1]
+            candidates = compat[current] & ~visited
+            if boosts_left <= 0:
+                candidates &= ~boost[current]
+            if violations_left <= 0:
+                candidates &= harmonic[current] | boost[current]
+            if max_duration is not None:
+                candidates &= total_duration + durations <= max_duration
+            if not candidates.any():
+                break
+
+            nxt = int(np.argmax(np.where(candidates, score[current], -1.0)))
+            if boost[current, nxt]:
+                boosts_left -= 1
+            elif not harmonic[current, nxt]:
+                violations_left -= 1
+
+            path.append(nxt)
+            visited[nxt] = True
+            total_duration += durations[nxt]
+
+        if end_idx is not None:
+            # Drop tracks off the tail until the end track can follow within the budgets
+            while len(path) > 1:
+                last = path[-1]
+                if (
+                    compat[last, end_idx]
+                    and (boosts_left > 0 or not boost[last, end_idx])
+                    and (violations_left > 0 or harmonic[last, end_idx] or boost[last, end_idx])
+                ):
+                    break
+                path.pop()
+                if boost[path[-1], last]:
+                    boosts_left += 1
+                elif not harmonic[path[-1], last]:
+                    violations_left += 1
+            if compat[path[-1], end_idx]:
+                path.append(end_idx)
+
+        return path
+
     def _extract_result(
         self,
         solver: cp_model.CpSolver,
         tracks: list[Track],
         included,
-        edge_vars,
-        violation_vars,
-        boost_vars,
-        quality_scores,
+        arcs,
+        harmonic_matrix: np.ndarray,
+        boost_matrix: np.ndarray,
+        quality_matrix: np.ndarray,
         status,
         dummy_idx: int,
     ) -> PlaylistResult:
@@ -361,42 +954,28 @@ class PlaylistOptimizer:
         if not selected_indices:
             return PlaylistResult(playlist=[], solver_status="no_solution")
 
-        # Get all selected edges
-        selected_edges = {
-            (i, j): solver.value(var) for (i, j), var in edge_vars.items() if solver.value(var) == 1
-        }
+        # Successor of each node on the circuit (-1 = node not on the circuit)
+        selected_edges = [(i, j) for i, j, var in arcs if solver.value(var)]
+        from_idx, to_idx = np.array(selected_edges, dtype=np.int64).reshape(-1, 2).T
+        next_of = np.full(num_tracks + 1, -1, dtype=np.int64)
+        next_of[from_idx] = to_idx
 
         # Reconstruct path using dummy node logic
         playlist, transitions = self._reconstruct_path_with_dummy(
             tracks,
-            selected_edges,
+            next_of,
             dummy_idx,
-            self.harmonic_level,
+            len(selected_indices),
+            harmonic_matrix,
+            boost_matrix,
+            quality_matrix,
             self.allow_halftime_bpm,
-            quality_scores,
-            boost_vars,
-        )
-
-        harmonic = sum(1 for t in transitions if t.is_harmonic)
-        non_harmonic = len(transitions) - harmonic
-
-        bpms = [t.bpm for t in playlist]
-        avg_bpm = sum(bpms) / len(bpms) if bpms else 0.0
-        bpm_range = (min(bpms), max(bpms)) if bpms else (0.0, 0.0)
-
-        statistics = PlaylistStatistics(
-            total_input_tracks=num_tracks,
-            playlist_length=len(playlist),
-            harmonic_transitions=harmonic,
-            non_harmonic_transitions=non_harmonic,
-            avg_bpm=avg_bpm,
-            bpm_range=bpm_range,
         )
 
         return PlaylistResult(
             playlist=playlist,
             transitions=transitions,
-            statistics=statistics,
+            statistics=_playlist_statistics(playlist, transitions, num_tracks),
             solver_status="optimal" if status == cp_model.OPTIMAL else "feasible",
             solver_time_seconds=solver.wall_time,
         )
@@ -404,63 +983,56 @@ class PlaylistOptimizer:
     def _reconstruct_path_with_dummy(
         self,
         tracks,
-        selected_edges,
+        next_of,
         dummy_idx,
-        harmonic_level,
+        path_length,
+        harmonic_matrix,
+        boost_matrix,
+        quality_matrix,
         allow_halftime,
-        quality_scores,
-        boost_vars,
     ):
-        start_node = None
-        for i, j in selected_edges:
-            if i == dummy_idx:
-                start_node = j
-                break
-
-        if start_node is None:
+        successors = next_of.tolist()
+
+        # Walk the successor array once, then look every transition up in a single batch.
+        # The solution fixes the path length, so the buffers are sized up front
+        path = [0] * path_length
+        num_nodes = 0
+        current = successors[dummy_idx]
+        while 0 <= current != dummy_idx and num_nodes < path_length:
+            path[num_nodes] = current
+            num_nodes += 1
+            current = successors[current]
+        # Only shrinks if the walk ended early on a broken successor chain
+        del path[num_nodes:]
+
+        if not path:
             return [], []
 
-        playlist = []
-        transitions = []
-
-        current = start_node
-        while current != dummy_idx:
-            playlist.append(tracks[current])
-
-            next_node = None
-            for i, j in selected_edges:
-                if i == current:
-                    next_node = j
-                    break
-
-            if next_node is None:
-                break
-
-            if next_node != dummy_idx:
-                is_harmonic = is_harmonic_compatible(
-                    tracks[current].key, tracks[next_node].key, harmonic_level
-                )
-
-                bpm_diff = get_bpm_difference(
-                    tracks[current].bpm, tracks[next_node].bpm, allow_halftime
-                )
-
-                quality, transition_type = get_transition_quality(
-                    tracks[current].key, tracks[next_node].key
-                )
-
-                transitions.append(
-                    TransitionInfo(
-                        from_track=tracks[current],
-                        to_track=tracks[next_node],
-                        is_harmonic=is_harmonic,
-                        is_bpm_compatible=True,
-                        bpm_difference=bpm_diff,
-                        transition_type=transition_type,
-                        quality_score=quality,
-                    )
-                )
-
-            current = next_node
+        playlist = [tracks[i] for i in path]
+        from_nodes, to_nodes = path[:-1], path[1:]
+        # Same tables the model was built from, so no key re-parsing here
+        harmonic = harmonic_matrix[from_nodes, to_nodes].tolist()
+        boosted = boost_matrix[from_nodes, to_nodes].tolist()
+        qualities = quality_matrix[from_nodes, to_nodes].tolist()
+
+        transitions = [None] * len(qualities)
+        for i, ((prev, nxt), is_harmonic, is_boost, quality) in enumerate(
+            zip(pairwise(playlist), harmonic, boosted, qualities, strict=True)
+        ):
+            if is_boost:
+                transition_type = TransitionType.ENERGY_BOOST
+            elif quality == 0.0:
+                transition_type = TransitionType.VIOLATION
+            else:
+                transition_type = TransitionType.SMOOTH
+            transitions[i] = TransitionInfo(
+                from_track=prev,
+                to_track=nxt,
+                is_harmonic=is_harmonic,
+                is_bpm_compatible=True,
+                bpm_difference=get_bpm_difference(prev.bpm, nxt.bpm, allow_halftime),
+                transition_type=transition_type,
+                quality_score=quality,
+            )
 
         return playlist, transitions
@@ -1,135 +1,119 @@
 """Rekordbox 6 database loader and XML exporter."""
 
 import logging
-import xml.etree.ElementTree as ET
+import os
+import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from importlib.util import find_spec
+from operator import attrgetter
 from pathlib import Path
+from typing import Any, TextIO
 from urllib.parse import quote
+from xml.sax.saxutils import escape
 
 from djkr8.models import PlaylistResult, Track
 
-try:
-    from pyrekordbox import Rekordbox6Database
-
-    HAS_PYREKORDBOX = True
-except ImportError:
-    HAS_PYREKORDBOX = False
-    Rekordbox6Database = None
+# pyrekordbox pulls in SQLAlchemy and its crypto stack, so it is only imported once a
+# RekordboxLoader is created; XML-only workflows never pay for it
+HAS_PYREKORDBOX = find_spec("pyrekordbox") is not None
+Rekordbox6Database = None
+DjmdContent = None
+DjmdSongPlaylist = None
 
 logger = logging.getLogger(__name__)
 
+# Max IDs per "IN (...)" query, well under SQLite's bound-parameter limit
+_CONTENT_BATCH_SIZE = 500
+
+# Columns every content row has; the optional ones are probed per playlist in get_tracks
+_CONTENT_FIELDS = attrgetter("Title", "Artist", "BPM", "Rating", "Length")
+
+# Paths made only of characters quote() never escapes
+_URL_SAFE_PATH_RE = re.compile(r"[A-Za-z0-9_.\-~/]*")
+
+# Characters ElementTree escapes in attribute values on top of &, < and >
+_XML_ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#09;"}
+
+
+# Camelot hour for each pitch class (sharp spelling), by mode
+_MAJOR_HOURS = {
+    "B": 1,
+    "F#": 2,
+    "C#": 3,
+    "G#": 4,
+    "D#": 5,
+    "A#": 6,
+    "F": 7,
+    "C": 8,
+    "G": 9,
+    "D": 10,
+    "A": 11,
+    "E": 12,
+}
+_MINOR_HOURS = {
+    "G#": 1,
+    "D#": 2,
+    "A#": 3,
+    "F": 4,
+    "C": 5,
+    "G": 6,
+    "D": 7,
+    "A": 8,
+    "E": 9,
+    "B": 10,
+    "F#": 11,
+    "C#": 12,
+}
 
-# Mapping from standard musical keys to Camelot notation
-KEY_MAPPING = {
-    # Major Keys
-    "B": "1B",
-    "B Major": "1B",
-    "B Maj": "1B",
-    "F#": "2B",
-    "F# Major": "2B",
-    "F# Maj": "2B",
-    "Gb": "2B",
-    "Gb Major": "2B",
-    "Gb Maj": "2B",
-    "Db": "3B",
-    "Db Major": "3B",
-    "Db Maj": "3B",
-    "C#": "3B",
-    "C# Major": "3B",
-    "C# Maj": "3B",
-    "Ab": "4B",
-    "Ab Major": "4B",
-    "Ab Maj": "4B",
-    "G#": "4B",
-    "G# Major": "4B",
-    "G# Maj": "4B",
-    "Eb": "5B",
-    "Eb Major": "5B",
-    "Eb Maj": "5B",
-    "D#": "5B",
-    "D# Major": "5B",
-    "D# Maj": "5B",
-    "Bb": "6B",
-    "Bb Major": "6B",
-    "Bb Maj": "6B",
-    "A#": "6B",
-    "A# Major": "6B",
-    "A# Maj": "6B",
-    "F": "7B",
-    "F Major": "7B",
-    "F Maj": "7B",
-    "C": "8B",
-    "C Major": "8B",
-    "C Maj": "8B",
-    "G": "9B",
-    "G Major": "9B",
-    "G Maj": "9B",
-    "D": "10B",
-    "D Major": "10B",
-    "D Maj": "10B",
-    "A": "11B",
-    "A Major": "11B",
-    "A Maj": "11B",
-    "E": "12B",
-    "E Major": "12B",
-    "E Maj": "12B",
-    # Minor Keys
-    "Abm": "1A",
-    "Ab Minor": "1A",
-    "Ab Min": "1A",
-    "G#m": "1A",
-    "G# Minor": "1A",
-    "G# Min": "1A",
-    "Ebm": "2A",
-    "Eb Minor": "2A",
-    "Eb Min": "2A",
-    "D#m": "2A",
-    "D# Minor": "2A",
-    "D# Min": "2A",
-    "Bbm": "3A",
-    "Bb Minor": "3A",
-    "Bb Min": "3A",
-    "A#m": "3A",
-    "A# Minor": "3A",
-    "A# Min": "3A",
-    "Fm": "4A",
-    "F Minor": "4A",
-    "F Min": "4A",
-    "Cm": "5A",
-    "C Minor": "5A",
-    "C Min": "5A",
-    "Gm": "6A",
-    "G Minor": "6A",
-    "G Min": "6A",
-    "Dm": "7A",
-    "D Minor": "7A",
-    "D Min": "7A",
-    "Am": "8A",
-    "A Minor": "8A",
-    "A Min": "8A",
-    "Em": "9A",
-    "E Minor": "9A",
-    "E Min": "9A",
-    "Bm": "10A",
-    "B Minor": "10A",
-    "B Min": "10A",
-    "F#m": "11A",
-    "F# Minor": "11A",
-    "F# Min": "11A",
-    "Gbm": "11A",
-    "Gb Minor": "11A",
-    "Gb Min": "11A",
-    "Dbm": "12A",
-    "Db Minor": "12A",
-    "Db Min": "12A",
-    "C#m": "12A",
-    "C# Minor": "12A",
-    "C# Min": "12A",
+# Flat and other enharmonic spellings folded onto the sharp spelling (uppercased)
+_ENHARMONIC = {
+    "DB": "C#",
+    "EB": "D#",
+    "GB": "F#",
+    "AB": "G#",
+    "BB": "A#",
+    "CB": "B",
+    "FB": "E",
+    "E#": "F",
+    "B#": "C",
 }
 
+# Note letter, optional accidental and optional mode word, with any spacing around them
+_KEY_RE = re.compile(
+    r"^\s*([A-G])\s*([#b♯♭]?)\s*(m|min|minor|maj|major)?\s*$",
+    re.IGNORECASE,
+)
+_ACCIDENTALS = {"": "", "#": "#", "♯": "#", "b": "B", "B": "B", "♭": "B"}
+
+
+@lru_cache(maxsize=256)
+def _musical_key_to_camelot(key_str: str) -> str | None:
+    """
+    Convert standard key notation ("Abm", "F# Major", "bb min") to Camelot, or None.
+
+    Examples:
+        >>> _musical_key_to_camelot("Abm")
+        '1A'
+        >>> _musical_key_to_camelot("C Major")
+        '8B'
+    """
+    match = _KEY_RE.match(key_str)
+    if match is None:
+        return None
+    letter, accidental, mode = match.groups()
+
+    note = letter.upper() + _ACCIDENTALS[accidental]
+    minor = mode is not None and mode[:3].upper() != "MAJ"
+    hour = (_MINOR_HOURS if minor else _MAJOR_HOURS).get(_ENHARMONIC.get(note, note))
+    if hour is None:
+        return None
+    return f"{hour}{'A' if minor else 'B'}"
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class PlaylistInfo:
     """Basic info about a Rekordbox playlist."""
 
@@ -139,6 +123,17 @@ class PlaylistInfo:
     count: int
 
 
+def _load_pyrekordbox():
+    """Import the pyrekordbox names used here into module globals on first use."""
+    global Rekordbox6Database, DjmdContent, DjmdSongPlaylist
+    if Rekordbox6Database is None:
+        from pyrekordbox import Rekordbox6Database
+    if DjmdContent is None:
+        from pyrekordbox.db6 import DjmdContent
+    if DjmdSongPlaylist is None:
+        from pyrekordbox.db6 import DjmdSongPlaylist
+
+
 class RekordboxLoader:
     """Handles interaction with Rekordbox 6 database."""
 
@@ -147,12 +142,35 @@ class RekordboxLoader:
             raise ImportError(
                 "pyrekordbox is not installed. Install with 'pip install pyrekordbox'"
             )
+        try:
+            _load_pyrekordbox()
+        except ImportError as e:
+            raise ImportError(
+                f"pyrekordbox could not be imported ({e}). Install with 'pip install pyrekordbox'"
+            ) from e
         try:
             self.db = Rekordbox6Database()
         except Exception as e:
             # Often fails if configuration file is missing or db locked
             raise RuntimeError(f"Failed to initialize Rekordbox database: {e}") from e
 
+        # Playlist walk and name index, built on first use and reset after writes
+        self._playlists: list | None = None
+        self._playlists_by_name: dict[str, Any] | None = None
+
+    def _playlist_index(self) -> dict[str, Any]:
+        """Map playlist names to playlist objects (first match wins, as in a linear scan)."""
+        if self._playlists_by_name is None:
+            self._playlists = list(self.db.get_playlist())
+            self._playlists_by_name = {}
+            for pl in self._playlists:
+                self._playlists_by_name.setdefault(pl.Name, pl)
+        return self._playlists_by_name
+
+    def _invalidate_playlist_index(self):
+        self._playlists = None
+        self._playlists_by_name = None
+
     def _convert_key(self, key_str: str | None) -> str:
         """Convert Rekordbox tonality to Camelot key."""
         if not key_str:
@@ -160,9 +178,10 @@ class RekordboxLoader:
 
         # Already in Camelot? (e.g. "8A", "12B")
         if key_str[0].isdigit() and key_str[-1] in ("A", "B"):
-            return key_str
+            return sys.intern(key_str)
 
-        return KEY_MAPPING.get(key_str, key_str)
+        # Interned so every track with the same key shares one string
+        return sys.intern(_musical_key_to_camelot(key_str) or key_str)
 
     def _normalize_energy(self, rating: int) -> int:
         """Normalize Rekordbox rating (0-255 or 0-5) to 1-5 energy scale."""
@@ -186,7 +205,8 @@ class RekordboxLoader:
         # For simplicity, let's just get the flat list if possible or walk the tree
         # Using the standard iterator which usually walks everything
 
-        for pl in self.db.get_playlist():
+        self._playlist_index()
+        for pl in self._playlists:
             # Filter out folders or root
             if pl.Name == "ROOT":
                 continue
@@ -204,50 +224,60 @@ class RekordboxLoader:
                     )
                 )
             except Exception as e:
-                logger.warning(f"Error reading playlist {pl.Name}: {e}")
+                logger.warning("Error reading playlist %s: %s", pl.Name, e)
 
         return playlists
 
     def get_tracks(self, playlist_name: str) -> list[Track]:
         """Get tracks from a specific playlist by name."""
-        target_pl = None
-        for pl in self.db.get_playlist():
-            if pl.Name == playlist_name:
-                target_pl = pl
-                break
+        target_pl = self._playlist_index().get(playlist_name)
 
         if not target_pl:
             raise ValueError(f"Playlist '{playlist_name}' not found")
 
+        songs = self._get_playlist_songs(target_pl)
+
+        # Content rows share one schema, so probe the optional columns once on the first
+        # row instead of calling getattr with a default for every track
+        sample = next((song.Content for song in songs if song.Content), None)
+        has_path = hasattr(sample, "FolderPath")
+        has_id = hasattr(sample, "ID")
+        has_key_name = hasattr(sample, "KeyName")
+        has_tonality = hasattr(sample, "Tonality")
+
         tracks = []
-        for song in target_pl.Songs:
+        for song in songs:
             content = song.Content
 
             if not content:
                 continue
 
             try:
-                # Rekordbox specific fields
-                title = content.Title or "Unknown"
-                artist = content.Artist.Name if content.Artist else "Unknown"
+                # Rekordbox specific fields, fetched in one C-level call
+                title, artist_row, bpm_raw, rating, length = _CONTENT_FIELDS(content)
+                title = title or "Unknown"
+                artist = artist_row.Name if artist_row else "Unknown"
                 track_id = f"{artist} - {title}"
 
                 # Try to get path - usually FolderPath in DB
-                path = getattr(content, "FolderPath", None)
-                rb_id = getattr(content, "ID", None)
+                path = content.FolderPath if has_path else None
+                rb_id = content.ID if has_id else None
 
-                bpm_raw = content.BPM or 0
+                bpm_raw = bpm_raw or 0
                 bpm_val = bpm_raw / 100.0 if bpm_raw > 200 else float(bpm_raw)
 
-                key_raw = getattr(content, "KeyName", None)
+                key_raw = content.KeyName if has_key_name else None
                 if not key_raw:
-                    key_raw = getattr(content, "Tonality", None)
+                    key_raw = content.Tonality if has_tonality else None
 
                 key = self._convert_key(key_raw)
 
                 if not key or bpm_val <= 0:
                     logger.warning(
-                        f"Skipping track {track_id}: Missing Key ({key_raw}) or BPM ({bpm_val})"
+                        "Skipping track %s: Missing Key (%s) or BPM (%s)",
+                        track_id,
+                        key_raw,
+                        bpm_val,
                     )
                     continue
 
@@ -256,8 +286,8 @@ class RekordboxLoader:
                         id=track_id,
                         key=key,
                         bpm=bpm_val,
-                        energy=self._normalize_energy(int(content.Rating or 0)),
-                        duration=float(content.Length or 0),
+                        energy=self._normalize_energy(int(rating or 0)),
+                        duration=float(length or 0),
                         path=path,
                         title=title,
                         artist=artist,
@@ -265,17 +295,51 @@ class RekordboxLoader:
                     )
                 )
             except Exception as e:
-                logger.warning(f"Error parsing track in playlist: {e}")
+                logger.warning("Error parsing track in playlist: %s", e)
                 continue
 
         return tracks
 
+    def _get_playlist_songs(self, playlist) -> list:
+        """
+        Load a playlist's entries with their Content, Artist and Key rows.
+
+        Iterating playlist.Songs lazy-loads each entry's Content and its relationships one
+        query at a time; eager selectin loading fetches them in a fixed number of queries.
+        """
+        from sqlalchemy.orm import selectinload
+
+        content = selectinload(DjmdSongPlaylist.Content)
+        return (
+            self.db.get_playlist_songs(PlaylistID=playlist.ID)
+            .options(
+                content.selectinload(DjmdContent.Artist),
+                content.selectinload(DjmdContent.Key),
+            )
+            .all()
+        )
+
+    def _get_contents_by_id(self, content_ids: list) -> dict:
+        """Fetch content rows for the given IDs with batched IN queries instead of one per ID."""
+        contents = {}
+        unique_ids = list(dict.fromkeys(content_ids))
+        for start in range(0, len(unique_ids), _CONTENT_BATCH_SIZE):
+            batch = unique_ids[start : start + _CONTENT_BATCH_SIZE]
+            try:
+                rows = self.db.get_content().filter(DjmdContent.ID.in_(batch)).all()
+            except Exception as e:
+                logger.warning("Failed to look up %d tracks in DB: %s", len(batch), e)
+                continue
+            # Content IDs are VARCHAR in the DB; key by string so int IDs match too
+            contents.update((str(row.ID), row) for row in rows)
+        return contents
+
     def write_playlist_to_db(self, result: PlaylistResult, name: str):
         """Write the optimized playlist directly to the Rekordbox database."""
         if not self.db:
             raise RuntimeError("Database not initialized")
 
-        logger.info(f"Creating playlist '{name}' in Rekordbox database...")
+        logger.info("Creating playlist '%s' in Rekordbox database...", name)
 
         # 1. Create playlist
         try:
@@ -289,32 +353,57 @@ class RekordboxLoader:
             raise RuntimeError(f"Failed to create playlist '{name}': {e}") from e
 
         # 2. Add tracks
+        # Entries go through add_to_playlist one at a time rather than a bulk insert:
+        # it assigns the row ID, UUID, TrackNo and USN bookkeeping that Rekordbox expects.
+        # Everything stays in one session transaction and is committed once below.
+        contents = self._get_contents_by_id(
+            [track.rekordbox_id for track in result.playlist if track.rekordbox_id]
+        )
         success_count = 0
         for track in result.playlist:
             if not track.rekordbox_id:
-                logger.warning(f"Track '{track.id}' has no Rekordbox ID, skipping add to DB.")
+                logger.warning("Track '%s' has no Rekordbox ID, skipping add to DB.", track.id)
                 continue
 
             try:
-                # We need to find the content object again or use ID if supported
-                # get_content lookup might be needed if add_to_playlist expects object
-                content = self.db.get_content(ID=track.rekordbox_id)
+                content = contents.get(str(track.rekordbox_id))
                 if content:
                     self.db.add_to_playlist(new_pl, content)
                     success_count += 1
                 else:
-                    logger.warning(f"Content ID {track.rekordbox_id} not found in DB")
+                    logger.warning("Content ID %s not found in DB", track.rekordbox_id)
             except Exception as e:
-                logger.warning(f"Failed to add track {track.id}: {e}")
+                logger.warning("Failed to add track %s: %s", track.id, e)
 
         # 3. Commit
         try:
             self.db.commit()
-            logger.info(f"Successfully created playlist '{name}' with {success_count} tracks.")
+            self._invalidate_playlist_index()
+            logger.info("Successfully created playlist '%s' with %d tracks.", name, success_count)
         except Exception as e:
             raise RuntimeError(f"Failed to commit changes to database: {e}") from e
 
 
+@lru_cache(maxsize=1024)
+def _quote_dir(directory: str) -> str:
+    """URL-quote a directory path; tracks from the same folder share the result."""
+    return quote(directory)
+
+
+def _quote_path(path: str) -> str:
+    """Same as quote(path), skipping the quoting work for already URL-safe paths."""
+    if _URL_SAFE_PATH_RE.fullmatch(path):
+        return path
+    # "/" is left as-is by quote, so the directory and file name can be quoted separately
+    directory, sep, name = path.rpartition("/")
+    return _quote_dir(directory) + sep + quote(name)
+
+
+def _xml_attr(value: str) -> str:
+    """Escape a value for a double-quoted XML attribute (same escaping as ElementTree)."""
+    return escape(value, _XML_ATTR_ENTITIES)
+
+
 def write_rekordbox_xml(result: PlaylistResult, source_playlist_name: str, output_path: Path):
     """
     Write optimization result to a Rekordbox-compatible XML file.
@@ -322,21 +411,37 @@ def write_rekordbox_xml(result: PlaylistResult, source_playlist_name: str, outpu
     The output filename is based on the source playlist name + timestamp,
     unless output_path is explicitly provided with a full path.
     """
+    # The document is flat and fixed-shape, so it is streamed to the file line by line
+    # instead of building and indenting an ElementTree in memory first
+    # It goes to a sibling temp file that only replaces output_path once complete, so a
+    # failure midway never leaves a truncated XML behind (or clobbers an existing export)
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        # newline="" keeps "\n" line endings on every platform
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            _write_rekordbox_xml_lines(f, result, source_playlist_name)
+        os.replace(tmp_path, output_path)
+        logger.info("Rekordbox XML exported to %s", output_path)
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        logger.error("Failed to write Rekordbox XML: %s", e)
+        raise
 
-    # Create root
-    root = ET.Element("DJ_PLAYLISTS", Version="1.0.0")
-    ET.SubElement(root, "PRODUCT", Name="rekordbox", Version="6.0.0", Company="AlphaTheta")
 
-    # COLLECTION
-    collection = ET.SubElement(root, "COLLECTION", Entries=str(len(result.playlist)))
+def _write_rekordbox_xml_lines(f: TextIO, result: PlaylistResult, source_playlist_name: str):
+    """Stream the Rekordbox XML document for result to an open text file."""
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<DJ_PLAYLISTS Version="1.0.0">\n')
+    f.write('  <PRODUCT Name="rekordbox" Version="6.0.0" Company="AlphaTheta" />\n')
 
-    track_id_map = {}
+    # COLLECTION
+    entries = len(result.playlist)
+    f.write(f'  <COLLECTION Entries="{entries}"' + (">\n" if entries else " />\n"))
 
-    for i, track in enumerate(result.playlist, 1):
+    for track_ref_id, track in enumerate(result.playlist, 1):
         # We need a numeric TrackID for internal reference in XML
         # We'll just use the index for simplicity
-        track_ref_id = str(i)
-        track_id_map[track.id] = track_ref_id
 
         # Prepare location - Rekordbox expects file:// URL format or absolute path
         # Usually it is file://localhost/path...
@@ -345,55 +450,42 @@ def write_rekordbox_xml(result: PlaylistResult, source_playlist_name: str, outpu
         if location and not location.startswith("file://"):
             # Ensure it's properly quoted for URL
             # basic encoding
-            path_part = quote(location)
+            path_part = _quote_path(location)
             location = f"file://localhost{path_part}"
 
-        track_elem = ET.SubElement(
-            collection,
-            "TRACK",
-            TrackID=track_ref_id,
-            Name=track.title or "Unknown",
-            Artist=track.artist or "Unknown",
-            Kind="Music",
-            TotalTime=str(int(track.duration)),
-            AverageBpm=str(track.bpm),
-            Tonality=track.key,
-            Rating=str(track.energy),
+        location_attr = f' Location="{_xml_attr(location)}"' if location else ""
+        f.write(
+            f'    <TRACK TrackID="{track_ref_id}"'
+            f' Name="{_xml_attr(track.title or "Unknown")}"'
+            f' Artist="{_xml_attr(track.artist or "Unknown")}"'
+            f' Kind="Music"'
+            f' TotalTime="{int(track.duration)}"'
+            f' AverageBpm="{track.bpm}"'
+            f' Tonality="{_xml_attr(track.key)}"'
+            f' Rating="{track.energy}"'
+            f"{location_attr} />\n"
         )
-        if location:
-            track_elem.set("Location", location)
+
+    if entries:
+        f.write("  </COLLECTION>\n")
 
     # PLAYLISTS
-    playlists_node = ET.SubElement(root, "PLAYLISTS")
-    root_node = ET.SubElement(playlists_node, "NODE", Type="0", Name="ROOT", Count="1")
+    f.write("  <PLAYLISTS>\n")
+    f.write('    <NODE Type="0" Name="ROOT" Count="1">\n')
 
     # Generate playlist name
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     playlist_name = f"{source_playlist_name}_{timestamp}"
 
-    playlist_node = ET.SubElement(
-        root_node,
-        "NODE",
-        Name=playlist_name,
-        Type="1",
-        KeyType="0",
-        Entries=str(len(result.playlist)),
+    f.write(
+        f'      <NODE Name="{_xml_attr(playlist_name)}" Type="1" KeyType="0" Entries="{entries}"'
+        + (">\n" if entries else " />\n")
     )
-
-    for track in result.playlist:
-        ref_id = track_id_map.get(track.id)
-        if ref_id:
-            ET.SubElement(playlist_node, "TRACK", Key=ref_id)
-
-    # Write to file
-    tree = ET.ElementTree(root)
-    ET.indent(tree, space="  ", level=0)
-
-    try:
-        with open(output_path, "wb") as f:
-            f.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
-            tree.write(f, encoding="utf-8", xml_declaration=False)
-        logger.info(f"Rekordbox XML exported to {output_path}")
-    except Exception as e:
-        logger.error(f"Failed to write Rekordbox XML: {e}")
-        raise
+    # Playlist entry i refers to collection TrackID i, so no second walk over the tracks
+    f.writelines(f'        <TRACK Key="{ref_id}" />\n' for ref_id in range(1, entries + 1))
+    if entries:
+        f.write("      </NODE>\n")
+
+    f.write("    </NODE>\n")
+    f.write("  </PLAYLISTS>\n")
+    f.write("</DJ_PLAYLISTS>")
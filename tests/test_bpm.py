@@ -1,6 +1,8 @@
 """Tests for BPM compatibility with halftime/doubletime support."""
 
-from djkr8.bpm import bpm_compatible, get_bpm_difference
+import pytest
+
+from djkr8.bpm import bpm_compat_matrix, bpm_compatible, get_bpm_difference
 
 
 class TestBpmCompatible:
@@ -86,3 +88,19 @@ class TestGetBpmDifference:
     def test_exact_match(self):
         assert get_bpm_difference(128, 128) == 0.0
         assert get_bpm_difference(75, 75) == 0.0
+
+
+class TestBpmCompatMatrix:
+    @pytest.mark.parametrize("allow_halftime", [True, False])
+    def test_matches_scalar_check(self, allow_halftime):
+        bpms = [64.0, 68.0, 75.0, 100.0, 118.0, 128.0, 132.5, 140.0, 150.0, 174.0]
+
+        matrix = bpm_compat_matrix(bpms, tolerance=10, allow_halftime=allow_halftime)
+
+        assert matrix.shape == (len(bpms), len(bpms))
+        for i, bpm1 in enumerate(bpms):
+            for j, bpm2 in enumerate(bpms):
+                assert matrix[i, j] == bpm_compatible(bpm1, bpm2, 10, allow_halftime)
+
+    def test_empty_input(self):
+        assert bpm_compat_matrix([]).shape == (0, 0)
@@ -18,6 +18,12 @@ class TestParseCamelotKey:
         assert parse_camelot_key("1A") == (1, "A")
         assert parse_camelot_key("1B") == (1, "B")
 
+    def test_parse_errors_are_raised_on_every_call(self):
+        # The memoized parser caches the failure, but each call must still raise
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Camelot hour must be 1-12"):
+                parse_camelot_key("13A")
+
     def test_lowercase_normalized(self):
         assert parse_camelot_key("8a") == (8, "A")
         assert parse_camelot_key("12b") == (12, "B")
@@ -65,6 +71,14 @@ class TestGetHourDistance:
         assert get_hour_distance(8, 8) == 0
         assert get_hour_distance(1, 1) == 0
 
+    def test_hours_off_the_wheel(self):
+        # Outside 1-12 there is no table entry; the plain arithmetic applies
+        assert get_hour_distance(1, 0) == 1
+        assert get_hour_distance(0, 0) == 0
+        assert get_hour_distance(13, 1) == 0
+        assert get_hour_distance(1, 13) == 0
+        assert get_hour_distance(-1, 2) == 3
+
 
 class TestIsHarmonicCompatible:
     def test_perfect_match(self):
@@ -145,6 +159,11 @@ class TestGetCompatibleKeys:
         assert "1B" in compatible
         assert "12A" in compatible
 
+    def test_returns_a_fresh_list(self):
+        compatible = get_compatible_keys("8A", HarmonicLevel.STRICT)
+        compatible.clear()
+        assert len(get_compatible_keys("8A", HarmonicLevel.STRICT)) == 4
+
 
 class TestTransitionQuality:
     def test_perfect_match_same_key(self):
@@ -223,3 +242,37 @@ class TestEnergyBoost:
         from djkr8.camelot import is_energy_boost
 
         assert is_energy_boost("5A", "7B") is False
+
+
+class TestCamelotTables:
+    def test_camelot_index(self):
+        from djkr8.camelot import CAMELOT_KEYS, camelot_index
+
+        assert len(CAMELOT_KEYS) == 24
+        assert camelot_index("1A") == 0
+        assert camelot_index("12B") == 23
+        assert camelot_index(" 8a ") == CAMELOT_KEYS.index("8A")
+        assert camelot_index("13A") == -1
+        assert camelot_index("invalid") == -1
+
+    def test_harmonic_matrix_matches_scalar_check(self):
+        from djkr8.camelot import CAMELOT_KEYS, HARMONIC_MATRIX
+
+        for level in HarmonicLevel:
+            matrix = HARMONIC_MATRIX[level]
+            assert matrix.shape == (24, 24)
+            for i, k1 in enumerate(CAMELOT_KEYS):
+                for j, k2 in enumerate(CAMELOT_KEYS):
+                    assert matrix[i, j] == is_harmonic_compatible(k1, k2, level)
+
+    def test_boost_and_quality_matrices(self):
+        from djkr8.camelot import (
+            CAMELOT_INDEX,
+            ENERGY_BOOST_MATRIX,
+            TRANSITION_QUALITY_MATRIX,
+        )
+
+        assert ENERGY_BOOST_MATRIX[CAMELOT_INDEX["5A"], CAMELOT_INDEX["7A"]]
+        assert not ENERGY_BOOST_MATRIX[CAMELOT_INDEX["8A"], CAMELOT_INDEX["9A"]]
+        assert TRANSITION_QUALITY_MATRIX[CAMELOT_INDEX["8A"], CAMELOT_INDEX["8B"]] == 0.9
+        assert TRANSITION_QUALITY_MATRIX[CAMELOT_INDEX["8A"], CAMELOT_INDEX["2B"]] == 0.0
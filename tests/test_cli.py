@@ -6,10 +6,14 @@ import pytest
 
 from djkr8 import PlaylistResult, PlaylistStatistics, Track, cli
 
+if cli.HAS_ORJSON:
+    import orjson
 
-@pytest.fixture
-def mock_tracks_json(tmp_path):
-    f = tmp_path / "tracks.json"
+
+@pytest.fixture(scope="session")
+def sample_tracks_json(tmp_path_factory):
+    # Read-only input shared by every test, so it is written once per session
+    f = tmp_path_factory.mktemp("cli") / "tracks.json"
     data = {
         "tracks": [
             {"id": "t1", "key": "1A", "bpm": 120},
@@ -17,68 +21,113 @@ def mock_tracks_json(tmp_path):
             {"id": "t3", "key": "2A", "bpm": 122},
         ]
     }
-    with open(f, "w") as fp:
-        json.dump(data, fp)
+    # Bytes in, like load_tracks_from_json reads them; orjson when the speedups extra is installed
+    f.write_bytes(orjson.dumps(data) if cli.HAS_ORJSON else json.dumps(data).encode())
     return f
 
 
 @pytest.fixture
-def mock_optimizer():
-    with patch("djkr8.cli.PlaylistOptimizer") as mock_opt:
-        instance = mock_opt.return_value
-        # Default successful result
-        instance.optimize.return_value = PlaylistResult(
-            playlist=[Track(id="t1", key="1A", bpm=120), Track(id="t2", key="1A", bpm=120)],
-            solver_status="OPTIMAL",
-            solver_time_seconds=0.1,
-            statistics=PlaylistStatistics(
-                total_input_tracks=3,
-                playlist_length=2,
-                harmonic_transitions=1,
-                non_harmonic_transitions=0,
-                avg_bpm=120.0,
-                bpm_range=(120.0, 120.0),
-            ),
-        )
-        yield mock_opt
+def mock_optimizer(monkeypatch):
+    mock_opt = MagicMock()
+    instance = mock_opt.return_value
+    # Default successful result
+    instance.optimize.return_value = PlaylistResult(
+        playlist=[Track(id="t1", key="1A", bpm=120), Track(id="t2", key="1A", bpm=120)],
+        solver_status="OPTIMAL",
+        solver_time_seconds=0.1,
+        statistics=PlaylistStatistics(
+            total_input_tracks=3,
+            playlist_length=2,
+            harmonic_transitions=1,
+            non_harmonic_transitions=0,
+            avg_bpm=120.0,
+            bpm_range=(120.0, 120.0),
+        ),
+    )
+    monkeypatch.setattr(cli, "PlaylistOptimizer", mock_opt)
+    return mock_opt
 
 
 class TestCLI:
-    def test_load_tracks_from_json(self, mock_tracks_json):
-        tracks = cli.load_tracks_from_json(mock_tracks_json)
+    def test_load_tracks_from_json(self, sample_tracks_json):
+        tracks = cli.load_tracks_from_json(sample_tracks_json)
         assert len(tracks) == 3
         assert tracks[0].id == "t1"
 
+    @pytest.mark.parametrize("has_orjson", [True, False], ids=["orjson", "stdlib"])
+    def test_load_tracks_orjson_bytes(self, tmp_path, monkeypatch, has_orjson):
+        orjson = pytest.importorskip("orjson")
+        monkeypatch.setattr(cli, "HAS_ORJSON", has_orjson)
+        f = tmp_path / "utf8.json"
+        f.write_bytes(
+            orjson.dumps([{"id": "t1", "key": "8A", "bpm": 128, "title": "Café Ünïcode"}])
+        )
+
+        tracks = cli.load_tracks_from_json(f)
+        assert tracks[0].title == "Café Ünïcode"
+
     def test_load_tracks_invalid_json(self, tmp_path):
         f = tmp_path / "bad.json"
-        with open(f, "w") as fp:
-            fp.write('{"tracks": "not_a_list"}')
+        f.write_text('{"tracks": "not_a_list"}')
 
         with pytest.raises(ValueError, match="must contain a 'tracks' array"):
             cli.load_tracks_from_json(f)
 
     def test_load_tracks_missing_fields(self, tmp_path):
         f = tmp_path / "missing.json"
-        with open(f, "w") as fp:
-            fp.write('{"tracks": [{"id": "t1"}]}')  # Missing key/bpm
+        f.write_text('{"tracks": [{"id": "t1"}]}')  # Missing key/bpm
 
         with pytest.raises(ValueError, match="Track missing required fields"):
             cli.load_tracks_from_json(f)
 
-    def test_main_basic_flow(self, mock_tracks_json, mock_optimizer, capsys):
-        with patch.object(sys, "argv", ["dj-optimize", str(mock_tracks_json)]):
+    def test_load_tracks_top_level_array(self, tmp_path):
+        f = tmp_path / "array.json"
+        f.write_text('[{"id": "t1", "key": "8A", "bpm": "128", "energy": 3}]')
+
+        tracks = cli.load_tracks_from_json(f)
+        assert len(tracks) == 1
+        assert tracks[0].bpm == 128.0
+        assert tracks[0].energy == 3
+
+    def test_load_tracks_shares_key_strings(self, tmp_path):
+        f = tmp_path / "keys.json"
+        f.write_text(
+            '[{"id": "t1", "key": "8A", "bpm": 128}, {"id": "t2", "key": "8A", "bpm": 126}]'
+        )
+
+        tracks = cli.load_tracks_from_json(f)
+        assert tracks[0].key is tracks[1].key
+
+    def test_load_tracks_non_dict_item(self, tmp_path):
+        f = tmp_path / "bad_item.json"
+        f.write_text('{"tracks": [{"id": "t1", "key": "8A", "bpm": 128}, "t2"]}')
+
+        with pytest.raises(ValueError, match="Each track must be a dictionary"):
+            cli.load_tracks_from_json(f)
+
+    def test_load_tracks_invalid_values(self, tmp_path):
+        f = tmp_path / "invalid.json"
+        f.write_text(
+            '{"tracks": [{"id": "t1", "key": "8A", "bpm": 128}, {"id": "t2", "key": "8A", "bpm": 0}]}'
+        )
+
+        with pytest.raises(ValueError, match="Invalid BPM"):
+            cli.load_tracks_from_json(f)
+
+    def test_main_basic_flow(self, sample_tracks_json, mock_optimizer, capsys):
+        with patch.object(sys, "argv", ["dj-optimize", str(sample_tracks_json)]):
             ret = cli.main()
             assert ret == 0
             captured = capsys.readouterr()
             assert "Found playlist with 2 tracks" in captured.out
 
-    def test_main_with_args(self, mock_tracks_json, mock_optimizer):
+    def test_main_with_args(self, sample_tracks_json, mock_optimizer):
         with patch.object(
             sys,
             "argv",
             [
                 "dj-optimize",
-                str(mock_tracks_json),
+                str(sample_tracks_json),
                 "--bpm-tolerance",
                 "5",
                 "--no-halftime",
@@ -104,14 +153,22 @@ class TestCLI:
             _, kwargs = instance.optimize.call_args
             assert kwargs["start_track_id"] == "t1"
 
-    def test_main_output_json(self, mock_tracks_json, mock_optimizer, tmp_path):
+    def test_main_output_json(self, sample_tracks_json, mock_optimizer, tmp_path):
         out = tmp_path / "out.json"
-        with patch.object(sys, "argv", ["dj-optimize", str(mock_tracks_json), "-o", str(out)]):
+        with patch.object(sys, "argv", ["dj-optimize", str(sample_tracks_json), "-o", str(out)]):
             ret = cli.main()
             assert ret == 0
             assert out.exists()
 
-    def test_main_rekordbox_flow(self, mock_optimizer):
+    @pytest.mark.parametrize(
+        ("argv", "loader_method", "loader_args"),
+        [
+            (["--rekordbox"], "list_playlists", ()),
+            (["--rekordbox", "--playlist", "Techno"], "get_tracks", ("Techno",)),
+        ],
+        ids=["list", "optimize"],
+    )
+    def test_main_rekordbox_flow(self, mock_optimizer, argv, loader_method, loader_args):
         with (
             patch("djkr8.cli.HAS_PYREKORDBOX", True),
             patch("djkr8.cli.RekordboxLoader") as mock_loader,
@@ -129,17 +186,10 @@ class TestCLI:
             loader.list_playlists.return_value = [pl1, pl2]
             loader.get_tracks.return_value = [Track(id="t1", key="1A", bpm=120)]
 
-            # Test listing
-            with patch.object(sys, "argv", ["dj-optimize", "--rekordbox"]):
-                ret = cli.main()
-                assert ret == 0
-                loader.list_playlists.assert_called_once()
-
-            # Test optimization
-            with patch.object(sys, "argv", ["dj-optimize", "--rekordbox", "--playlist", "Techno"]):
+            with patch.object(sys, "argv", ["dj-optimize", *argv]):
                 ret = cli.main()
                 assert ret == 0
-                loader.get_tracks.assert_called_with("Techno")
+                getattr(loader, loader_method).assert_called_once_with(*loader_args)
 
     def test_main_rekordbox_write_db(self, mock_optimizer):
         with (
@@ -179,12 +229,12 @@ class TestCLI:
                 assert ret == 0
                 mock_write.assert_called_once()
 
-    def test_main_no_solution(self, mock_tracks_json):
+    def test_main_no_solution(self, sample_tracks_json):
         # Force empty result
         with patch("djkr8.cli.PlaylistOptimizer") as mock_opt:
             instance = mock_opt.return_value
             instance.optimize.return_value = PlaylistResult(playlist=[], solver_status="INFEASIBLE")
 
-            with patch.object(sys, "argv", ["dj-optimize", str(mock_tracks_json)]):
+            with patch.object(sys, "argv", ["dj-optimize", str(sample_tracks_json)]):
                 ret = cli.main()
                 assert ret == 1
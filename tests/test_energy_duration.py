@@ -32,12 +32,17 @@ class TestEnergyAndDuration:
         assert len(result.playlist) == 2
         assert sum(t.duration for t in result.playlist) <= 400.0
 
-    def test_track_validation(self):
-        with pytest.raises(ValueError, match="Energy must be between 1 and 5"):
-            Track(id="bad", key="8A", bpm=120, energy=6)
-
-        with pytest.raises(ValueError, match="Duration cannot be negative"):
-            Track(id="bad", key="8A", bpm=120, duration=-1.0)
+    @pytest.mark.parametrize(
+        ("kwargs", "match"),
+        [
+            ({"energy": 6}, "Energy must be between 1 and 5"),
+            ({"duration": -1.0}, "Duration cannot be negative"),
+        ],
+        ids=["energy-too-high", "negative-duration"],
+    )
+    def test_track_validation(self, kwargs, match):
+        with pytest.raises(ValueError, match=match):
+            Track(id="bad", key="8A", bpm=120, **kwargs)
 
     def test_max_energy_increase_constraint(self):
         tracks = [
@@ -1,5 +1,7 @@
 """Integration tests for the playlist optimizer."""
 
+import pytest
+
 from djkr8 import (
     HarmonicLevel,
     PlaylistOptimizer,
@@ -63,20 +65,23 @@ class TestPlaylistOptimizerIntegration:
 
         assert len(result.playlist) <= 1
 
-    def test_harmonic_strict_vs_moderate(self):
+    @pytest.mark.parametrize(
+        ("level", "harmonic", "non_harmonic"),
+        [(HarmonicLevel.STRICT, 0, 1), (HarmonicLevel.MODERATE, 1, 0)],
+        ids=["strict", "moderate"],
+    )
+    def test_harmonic_strict_vs_moderate(self, level, harmonic, non_harmonic):
+        # 8A -> 9B is a diagonal move: only MODERATE and looser count it as harmonic
         tracks = [
             Track(id="track_1", key="8A", bpm=128),
             Track(id="track_2", key="9B", bpm=130),
         ]
 
-        strict_optimizer = PlaylistOptimizer(harmonic_level=HarmonicLevel.STRICT)
-        _strict_result = strict_optimizer.optimize(tracks)
-
-        moderate_optimizer = PlaylistOptimizer(harmonic_level=HarmonicLevel.MODERATE)
-        moderate_result = moderate_optimizer.optimize(tracks)
+        result = PlaylistOptimizer(harmonic_level=level).optimize(tracks)
 
-        if len(moderate_result.playlist) == 2:
-            assert moderate_result.statistics.harmonic_transitions >= 1
+        assert len(result.playlist) == 2
+        assert result.statistics.harmonic_transitions == harmonic
+        assert result.statistics.non_harmonic_transitions == non_harmonic
 
     def test_complex_playlist(self):
         optimizer = PlaylistOptimizer(
@@ -1,29 +1,26 @@
 import pytest
 
-from djkr8.models import PlaylistStatistics, Track
+from djkr8.models import PlaylistResult, PlaylistStatistics, Track
 
 
 class TestModels:
-    def test_track_validation(self):
-        # Test empty ID
-        with pytest.raises(ValueError, match="Track id cannot be empty"):
-            Track(id="", key="1A", bpm=120)
-
-        # Test invalid BPM
-        with pytest.raises(ValueError, match="Invalid BPM"):
-            Track(id="t1", key="1A", bpm=0)
-
-        # Test invalid Key
-        with pytest.raises(ValueError, match="Invalid Camelot key"):
-            Track(id="t1", key="X", bpm=120)
-
-        # Test invalid Energy
-        with pytest.raises(ValueError, match="Energy must be between"):
-            Track(id="t1", key="1A", bpm=120, energy=11)
-
-        # Test negative Duration
-        with pytest.raises(ValueError, match="Duration cannot be negative"):
-            Track(id="t1", key="1A", bpm=120, duration=-1.0)
+    @pytest.mark.parametrize(
+        ("kwargs", "match"),
+        [
+            ({"id": "", "key": "1A", "bpm": 120}, "Track id cannot be empty"),
+            ({"id": "t1", "key": "1A", "bpm": 0}, "Invalid BPM"),
+            ({"id": "t1", "key": "X", "bpm": 120}, "Invalid Camelot key"),
+            ({"id": "t1", "key": "1A", "bpm": 120, "energy": 11}, "Energy must be between"),
+            (
+                {"id": "t1", "key": "1A", "bpm": 120, "duration": -1.0},
+                "Duration cannot be negative",
+            ),
+        ],
+        ids=["empty-id", "zero-bpm", "bad-key", "energy-too-high", "negative-duration"],
+    )
+    def test_track_validation(self, kwargs, match):
+        with pytest.raises(ValueError, match=match):
+            Track(**kwargs)
 
     def test_statistics_edge_cases(self):
         # Zero tracks -> coverage
@@ -42,3 +39,19 @@ class TestModels:
         stats.playlist_length = 1
         # No transitions if length 1
         assert stats.harmonic_pct == 100.0
+
+    def test_models_are_slotted(self):
+        track = Track(id="t1", key="1A", bpm=120)
+        assert not hasattr(track, "__dict__")
+        with pytest.raises(AttributeError):
+            track.genre = "house"
+
+        result = PlaylistResult(playlist=[track])
+        assert not hasattr(result, "__dict__")
+        assert result.statistics is not None
+        assert result.statistics.playlist_length == 1
+
+    def test_track_unchecked_matches_constructor(self):
+        track = Track.unchecked("t1", "8A", 128.0, energy=3, title="Song")
+        assert track == Track(id="t1", key="8A", bpm=128.0, energy=3, title="Song")
+        assert track.rekordbox_id is None
@@ -1,5 +1,24 @@
-from djkr8.models import HarmonicLevel, Track
-from djkr8.optimizer import PlaylistOptimizer
+from itertools import pairwise
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from ortools.sat.python import cp_model
+
+from djkr8.bpm import bpm_compatible
+from djkr8.camelot import (
+    camelot_index,
+    get_transition_quality,
+    is_energy_boost,
+    is_harmonic_compatible,
+)
+from djkr8.models import HarmonicLevel, SolveMode, Track
+from djkr8.optimizer import (
+    PlaylistOptimizer,
+    _bpm_energy_compat,
+    _canonicalize_path,
+    _longest_path_bound,
+)
 
 
 class TestOptimizerFeatures:
@@ -107,3 +126,424 @@ class TestOptimizerFeatures:
         # Implementation caps target at num_tracks, so it returns max possible (2)
         assert len(result.playlist) == 2
         assert result.solver_status in ("optimal", "feasible")
+
+    def test_greedy_warm_start_finds_solution_quickly(self):
+        keys = [f"{h}{letter}" for h in range(1, 13) for letter in ("A", "B")]
+        tracks = [
+            Track(
+                id=f"t{i}",
+                key=keys[(i * 7) % 24],
+                bpm=110.0 + (i * 13) % 30,
+                energy=1 + (i * 3) % 5,
+            )
+            for i in range(100)
+        ]
+
+        optimizer = PlaylistOptimizer(time_limit_seconds=1.0)
+        result = optimizer.optimize(tracks)
+
+        assert result.solver_status in ("optimal", "feasible")
+        assert len(result.playlist) > 1
+
+    def test_greedy_hint_honours_end_and_must_include(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0) for i in range(6)]
+        optimizer = PlaylistOptimizer()
+        compat, _, harmonic, boost, quality = optimizer._build_compat_matrices(tracks)
+
+        path = optimizer._greedy_path(
+            compat, harmonic, boost, quality, tracks, 0, 4, 0, end_idx=1, must_include_indices=[5]
+        )
+
+        assert path[0] == 0
+        assert path[-1] == 1
+        assert 5 in path
+        assert len(path) == 4
+
+    def test_greedy_hint_backtracks_to_reach_end(self):
+        tracks = [
+            Track(id="s", key="1A", bpm=120.0),
+            Track(id="a", key="2A", bpm=120.0),
+            Track(id="b", key="3A", bpm=120.0),
+            Track(id="e", key="1A", bpm=120.0),
+        ]
+        optimizer = PlaylistOptimizer(harmonic_level=HarmonicLevel.STRICT, max_energy_boosts=0)
+        compat, _, harmonic, boost, quality = optimizer._build_compat_matrices(tracks)
+
+        path = optimizer._greedy_path(
+            compat, harmonic, boost, quality, tracks, 0, None, 0, end_idx=3
+        )
+
+        # 3A -> 1A would be an energy boost, so "b" is dropped to land on the end track
+        assert path == [0, 1, 3]
+
+    def test_transition_details_match_camelot_rules(self):
+        tracks = [
+            Track(id="a", key="5A", bpm=120),
+            Track(id="b", key="7A", bpm=120),
+            Track(id="c", key="7B", bpm=120),
+        ]
+
+        result = PlaylistOptimizer().optimize(tracks, start_track_id="a")
+
+        assert len(result.playlist) == 3
+        for transition in result.transitions:
+            key1, key2 = transition.from_track.key, transition.to_track.key
+            assert (transition.quality_score, transition.transition_type) == (
+                get_transition_quality(key1, key2)
+            )
+            assert transition.is_harmonic == is_harmonic_compatible(key1, key2)
+
+    def test_duplicate_tracks_symmetry_breaking(self):
+        # Three groups of identical tracks; pinning one copy keeps it out of its bucket
+        tracks = [Track(id=f"a{i}", key="8A", bpm=128.0, energy=3) for i in range(5)]
+        tracks += [Track(id=f"b{i}", key="9A", bpm=128.0, energy=3) for i in range(4)]
+        tracks += [Track(id=f"c{i}", key="9B", bpm=128.0, energy=4) for i in range(3)]
+
+        optimizer = PlaylistOptimizer(max_violation_pct=0.0, max_energy_boosts=0)
+        result = optimizer.optimize(tracks, end_track_id="a0", target_length=6)
+
+        assert result.solver_status == "optimal"
+        assert len(result.playlist) == 6
+        assert result.playlist[-1].id == "a0"
+        assert all(t.is_harmonic for t in result.transitions)
+
+    def test_bpm_tolerance_boundary_uses_exact_bpms(self):
+        # 10.05 BPM apart: tenths rounding would have treated this as 10.0 and chained them
+        tracks = [
+            Track(id="t1", key="8A", bpm=120.15),
+            Track(id="t2", key="8A", bpm=130.2),
+        ]
+
+        optimizer = PlaylistOptimizer(bpm_tolerance=10, allow_halftime_bpm=False)
+        result = optimizer.optimize(tracks)
+
+        assert not bpm_compatible(120.15, 130.2, 10, False)
+        assert len(result.playlist) == 1
+
+    @pytest.mark.parametrize("tolerance", [0.15, 0.3, 2.5, 5.05, 10.0])
+    @pytest.mark.parametrize("allow_halftime", [True, False])
+    def test_compat_matrix_matches_bpm_compatible(self, tolerance, allow_halftime):
+        # Two-decimal BPMs like Rekordbox stores, placed on and around the tolerance edges
+        rng = np.random.default_rng(0)
+        base = rng.integers(6000, 18000, 40) / 100
+        step = round(tolerance * 100)
+        bpms = np.concatenate(
+            [base, base + step / 100, base + (step + 1) / 100, base / 2, base * 2 - 0.01]
+        ).round(2)
+        energies = np.full(len(bpms), 3, dtype=np.int64)
+
+        compat = _bpm_energy_compat(bpms, energies, tolerance, allow_halftime, False)
+
+        expected = np.array(
+            [[bpm_compatible(a, b, tolerance, allow_halftime) for b in bpms] for a in bpms]
+        )
+        np.fill_diagonal(expected, False)
+        assert np.array_equal(compat, expected)
+
+    def test_isolated_tracks_are_pruned(self):
+        # No two tracks are BPM compatible, so only a one-track playlist is possible
+        tracks = [
+            Track(id="t1", key="8A", bpm=90.0),
+            Track(id="t2", key="8A", bpm=110.0),
+            Track(id="t3", key="8A", bpm=150.0),
+        ]
+
+        optimizer = PlaylistOptimizer(bpm_tolerance=5.0, allow_halftime_bpm=False)
+        result = optimizer.optimize(tracks)
+
+        assert result.solver_status == "optimal"
+        assert len(result.playlist) == 1
+
+    def test_isolated_track_can_beat_connected_tracks(self):
+        # With a heavy energy weight, the lone high-energy track outscores the pair
+        tracks = [
+            Track(id="low1", key="8A", bpm=120.0, energy=1),
+            Track(id="low2", key="8A", bpm=121.0, energy=1),
+            Track(id="peak", key="8A", bpm=175.0, energy=5),
+        ]
+
+        optimizer = PlaylistOptimizer(
+            bpm_tolerance=5.0,
+            allow_halftime_bpm=False,
+            energy_weight=50.0,
+            transition_quality_weight=0.0,
+        )
+        result = optimizer.optimize(tracks)
+
+        assert [t.id for t in result.playlist] == ["peak"]
+        assert result.solver_status == "optimal"
+
+    @pytest.mark.parametrize("allow_halftime", [True, False])
+    @pytest.mark.parametrize("enforce_energy_flow", [True, False])
+    def test_numba_compat_kernel_matches_numpy(self, allow_halftime, enforce_energy_flow):
+        pytest.importorskip("numba")
+        from djkr8._numba_kernels import bpm_energy_compat
+
+        rng = np.random.default_rng(0)
+        bpms = rng.integers(6000, 18000, 300) / 100
+        energies = rng.integers(1, 6, 300).astype(np.int64)
+
+        expected = _bpm_energy_compat(bpms, energies, 5.05, allow_halftime, enforce_energy_flow)
+        actual = bpm_energy_compat(bpms, energies, 5.05, allow_halftime, enforce_energy_flow)
+
+        assert np.array_equal(actual, expected)
+
+    def test_reoptimize_reuses_previous_solution(self):
+        tracks = [
+            Track(id=f"t{i}", key=f"{(i % 12) + 1}A", bpm=120.0 + i, energy=3) for i in range(12)
+        ]
+        optimizer = PlaylistOptimizer(max_violation_pct=0.2)
+
+        first = optimizer.optimize(tracks)
+        assert optimizer._last_solution == [t.id for t in first.playlist]
+
+        # Drop a track and tighten the tolerance: the old playlist is only a partial hint now
+        optimizer.bpm_tolerance = 3.0
+        remaining = [t for t in tracks if t.id != first.playlist[1].id]
+        second = optimizer.optimize(remaining)
+
+        assert second.solver_status in ("optimal", "feasible")
+        assert all(t.bpm_difference <= 3.0 for t in second.transitions)
+
+    def test_previous_path_is_cut_at_invalid_transition(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0) for i in range(4)]
+        optimizer = PlaylistOptimizer()
+        optimizer._last_solution = ["t0", "gone", "t1", "t2", "t3"]
+        id_to_idx = {t.id: i for i, t in enumerate(tracks)}
+        compat = np.ones((4, 4), dtype=bool)
+        compat[1, 2] = False
+
+        assert optimizer._previous_path(id_to_idx, compat, None, None) == [0, 1]
+        assert optimizer._previous_path(id_to_idx, compat, 2, None) == []
+
+    def test_compat_matrices_match_pairwise_rules(self):
+        keys = ["8A", "9A", "8B", "10A", "3B", "8A"]
+        bpms = [128.0, 131.5, 64.5, 140.0, 126.0, 127.0]
+        energies = [3, 4, 3, 5, 2, 4]
+        tracks = [
+            Track(id=f"t{i}", key=k, bpm=b, energy=e)
+            for i, (k, b, e) in enumerate(zip(keys, bpms, energies, strict=True))
+        ]
+        optimizer = PlaylistOptimizer(bpm_tolerance=4.0, harmonic_level=HarmonicLevel.MODERATE)
+
+        compat, key_ids, harmonic, boost, _ = optimizer._build_compat_matrices(tracks)
+
+        assert key_ids.tolist() == [camelot_index(k) for k in keys]
+        for i, a in enumerate(tracks):
+            for j, b in enumerate(tracks):
+                energy_ok = 0 <= b.energy - a.energy <= 1
+                expected = i != j and energy_ok and bpm_compatible(a.bpm, b.bpm, 4.0)
+                assert compat[i, j] == expected
+                assert harmonic[i, j] == is_harmonic_compatible(
+                    a.key, b.key, HarmonicLevel.MODERATE
+                )
+                assert boost[i, j] == is_energy_boost(a.key, b.key)
+
+    def test_warm_start_can_be_disabled_and_cleared(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0 + i) for i in range(4)]
+        id_to_idx = {t.id: i for i, t in enumerate(tracks)}
+        compat = np.ones((4, 4), dtype=bool)
+
+        optimizer = PlaylistOptimizer(warm_start=False)
+        optimizer.optimize(tracks)
+        assert optimizer._last_solution
+
+        with patch.object(optimizer, "_previous_path") as previous_path:
+            optimizer.optimize(tracks)
+        previous_path.assert_not_called()
+
+        optimizer.clear_warm_start()
+        assert optimizer._previous_path(id_to_idx, compat, None, None) == []
+
+    @pytest.mark.parametrize("use_redundant_constraints", [True, False])
+    def test_redundant_constraints_keep_solution(self, use_redundant_constraints):
+        tracks = [
+            Track(id=f"t{i}", key=f"{(i % 4) + 8}A", bpm=124.0 + i, energy=3) for i in range(8)
+        ]
+        optimizer = PlaylistOptimizer(use_redundant_constraints=use_redundant_constraints)
+
+        result = optimizer.optimize(tracks, start_track_id="t0", end_track_id="t7")
+
+        assert result.solver_status == "optimal"
+        assert len(result.playlist) == 8
+        assert len(result.transitions) == 7
+
+    def test_collapse_duplicates_plays_copies_back_to_back(self):
+        tracks = [
+            Track(id="a1", key="8A", bpm=124.0, energy=3),
+            Track(id="b", key="9A", bpm=126.0, energy=3),
+            Track(id="a2", key="8A", bpm=124.0, energy=3),
+            Track(id="c", key="10A", bpm=128.0, energy=4),
+            Track(id="a3", key="8A", bpm=124.0, energy=3),
+        ]
+        optimizer = PlaylistOptimizer(collapse_duplicates=True)
+
+        result = optimizer.optimize(tracks)
+
+        ids = [t.id for t in result.playlist]
+        assert sorted(ids) == ["a1", "a2", "a3", "b", "c"]
+        start = ids.index("a1")
+        assert ids[start : start + 3] == ["a1", "a2", "a3"]
+        assert len(result.transitions) == 4
+        for transition, (prev, nxt) in zip(
+            result.transitions, pairwise(result.playlist), strict=True
+        ):
+            assert (transition.from_track, transition.to_track) == (prev, nxt)
+        assert result.statistics.total_input_tracks == 5
+        assert result.statistics.harmonic_transitions == 4
+
+    def test_collapse_duplicates_keeps_near_identical_bpms_apart(self):
+        # 0.08 BPM apart: only a is within 10 BPM of c, so b must not stand in for it
+        tracks = [
+            Track(id="a", key="8A", bpm=120.04, energy=3),
+            Track(id="b", key="8A", bpm=119.96, energy=3),
+            Track(id="c", key="8A", bpm=130.0, energy=3),
+        ]
+        optimizer = PlaylistOptimizer(
+            collapse_duplicates=True, bpm_tolerance=10, allow_halftime_bpm=False
+        )
+
+        result = optimizer.optimize(tracks)
+
+        # a has to sit between b and c, in either direction
+        assert [t.id for t in result.playlist] in (["b", "a", "c"], ["c", "a", "b"])
+        for transition in result.transitions:
+            assert bpm_compatible(
+                transition.from_track.bpm, transition.to_track.bpm, 10, allow_halftime=False
+            )
+
+    def test_fast_mode_returns_first_solution(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0 + i, energy=3) for i in range(10)]
+        optimizer = PlaylistOptimizer(mode=SolveMode.FAST)
+
+        with patch.object(
+            cp_model.CpSolver, "solve", autospec=True, side_effect=cp_model.CpSolver.solve
+        ) as solve:
+            result = optimizer.optimize(tracks)
+        solver = solve.call_args.args[0]
+
+        assert solver.parameters.stop_after_first_solution
+        assert solver.parameters.max_time_in_seconds < optimizer.time_limit_seconds
+        assert result.solver_status in ("optimal", "feasible")
+        assert len(result.playlist) >= 1
+
+    def test_decision_strategy_branches_on_must_include_first(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0, energy=3) for i in range(6)]
+        optimizer = PlaylistOptimizer(num_workers=1)
+
+        with patch.object(
+            cp_model.CpSolver, "solve", autospec=True, side_effect=cp_model.CpSolver.solve
+        ) as solve:
+            result = optimizer.optimize(tracks, must_include_ids=["t4", "t2"])
+        model = solve.call_args.args[1]
+
+        (strategy,) = model.proto.search_strategy
+        assert [expr.vars[0] for expr in strategy.exprs] == [4, 2, 0, 1, 3, 5]
+        assert strategy.domain_reduction_strategy == cp_model.SELECT_MAX_VALUE
+        assert {"t2", "t4"} <= {t.id for t in result.playlist}
+
+    def test_violation_budget_uses_no_reified_constraints(self):
+        keys = ["1A", "2A", "5B", "8A", "3A", "9B"]
+        tracks = [Track(id=f"t{i}", key=key, bpm=120.0 + i) for i, key in enumerate(keys)]
+        optimizer = PlaylistOptimizer(
+            harmonic_level=HarmonicLevel.RELAXED, max_violation_pct=0.5, max_energy_boosts=1
+        )
+
+        with patch.object(
+            cp_model.CpSolver, "solve", autospec=True, side_effect=cp_model.CpSolver.solve
+        ) as solve:
+            result = optimizer.optimize(tracks)
+        model = solve.call_args.args[1]
+
+        assert result.solver_status in ("optimal", "feasible")
+        # Budgets are plain linear sums over edge literals: no half-reified pairs
+        assert not any(constraint.enforcement_literal for constraint in model.proto.constraints)
+
+    @pytest.mark.parametrize("debug_names", [False, True])
+    def test_debug_names(self, debug_names):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0 + i) for i in range(3)]
+        optimizer = PlaylistOptimizer(debug_names=debug_names)
+
+        with patch.object(
+            cp_model.CpSolver, "solve", autospec=True, side_effect=cp_model.CpSolver.solve
+        ) as solve:
+            result = optimizer.optimize(tracks)
+        names = {variable.name for variable in solve.call_args.args[1].proto.variables}
+
+        assert len(result.playlist) == 3
+        assert ("inc_0" in names) == debug_names
+        assert ("edge_0_1" in names) == debug_names
+
+    def test_solver_params_override_defaults(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0 + i) for i in range(3)]
+        optimizer = PlaylistOptimizer(solver_params={"cp_model_probing_level": 0, "random_seed": 7})
+
+        with patch.object(
+            cp_model.CpSolver, "solve", autospec=True, side_effect=cp_model.CpSolver.solve
+        ) as solve:
+            result = optimizer.optimize(tracks)
+        parameters = solve.call_args.args[0].parameters
+
+        assert len(result.playlist) == 3
+        assert parameters.cp_model_probing_level == 0
+        assert parameters.random_seed == 7
+        assert parameters.linearization_level == 2
+
+    def test_unknown_solver_param_raises(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0 + i) for i in range(3)]
+        optimizer = PlaylistOptimizer(solver_params={"not_a_parameter": 1})
+
+        with pytest.raises(AttributeError):
+            optimizer.optimize(tracks)
+
+    def test_must_include_ids_are_deduplicated(self):
+        tracks = [Track(id=f"t{i}", key="8A", bpm=120.0 + i) for i in range(4)]
+        optimizer = PlaylistOptimizer()
+
+        with patch("djkr8.optimizer.logger") as logger:
+            result = optimizer.optimize(
+                tracks, must_include_ids=["t2", "missing", "t2", "gone", "missing"]
+            )
+
+        assert len(result.playlist) == 4
+        logger.warning.assert_called_once_with(
+            "Must-include tracks not found, skipping: missing, gone"
+        )
+
+    def test_canonicalize_path_uses_bucket_members_in_order(self):
+        buckets = [[1, 4, 6], [2, 5]]
+
+        path = _canonicalize_path([6, 0, 5, 4, 3, 2], buckets)
+
+        # Bucket tracks keep their slots but are relabelled lowest index first
+        assert path == [1, 0, 2, 4, 3, 5]
+        assert _canonicalize_path([0, 3], buckets) == [0, 3]
+
+    def test_longest_path_bound_over_components(self):
+        # 0 <-> 1 form a cycle feeding the chain 2 -> 3; 4 only reaches 3
+        edges = np.zeros((5, 5), dtype=bool)
+        for i, j in [(0, 1), (1, 0), (1, 2), (2, 3), (4, 3)]:
+            edges[i, j] = True
+
+        assert _longest_path_bound(edges, None, None) == 4
+        assert _longest_path_bound(edges, 4, None) == 2
+        assert _longest_path_bound(edges, None, 2) == 3
+        assert _longest_path_bound(edges, 3, 0) == 0
+
+    def test_unreachable_target_length_skips_solver(self):
+        # Energy flow cannot jump from 2 to 4, so at most the two low or two high tracks play
+        tracks = [
+            Track(id="a", key="8A", bpm=120, energy=1),
+            Track(id="b", key="8A", bpm=120, energy=2),
+            Track(id="c", key="8A", bpm=120, energy=4),
+            Track(id="d", key="8A", bpm=120, energy=5),
+        ]
+        optimizer = PlaylistOptimizer()
+
+        with patch.object(cp_model.CpSolver, "solve") as solve:
+            result = optimizer.optimize(tracks, target_length=3)
+
+        solve.assert_not_called()
+        assert result.solver_status == "infeasible_target_length"
+        assert result.playlist == []
+        assert len(optimizer.optimize(tracks, target_length=2).playlist) == 2
@@ -1,5 +1,9 @@
+import subprocess
+import sys
 import xml.etree.ElementTree as ET
-from unittest.mock import MagicMock, patch
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -7,8 +11,8 @@ from djkr8 import rekordbox
 from djkr8.models import PlaylistResult, Track
 
 
-# Sample data for tests
-@pytest.fixture
+# Sample data for tests; shared by the whole module, so tests must not mutate the tracks
+@pytest.fixture(scope="module")
 def sample_tracks():
     return [
         Track(
@@ -34,182 +38,332 @@ def sample_tracks():
 
 @pytest.fixture
 def playlist_result(sample_tracks):
-    return PlaylistResult(playlist=sample_tracks)
+    # A fresh list per test, so replacing entries never leaks into other tests
+    return PlaylistResult(playlist=list(sample_tracks))
+
+
+@pytest.fixture(scope="session")
+def rkb_db6():
+    # The loader binds the pyrekordbox ORM tables on first use; skip rather than fail without it
+    return pytest.importorskip("pyrekordbox.db6")
+
+
+@pytest.fixture
+def rkb_env(monkeypatch, rkb_db6):
+    """Pretend pyrekordbox is available; RekordboxLoader() opens the returned mock database."""
+    db = MagicMock()
+    monkeypatch.setattr(rekordbox, "HAS_PYREKORDBOX", True)
+    monkeypatch.setattr(rekordbox, "Rekordbox6Database", lambda: db)
+    return db
 
 
 class TestRekordboxLoader:
-    def test_init_no_pyrekordbox(self):
-        with (
-            patch("djkr8.rekordbox.HAS_PYREKORDBOX", False),
-            pytest.raises(ImportError, match="pyrekordbox is not installed"),
-        ):
+    def test_import_is_lazy(self):
+        # Fresh interpreter: other tests in this session may already have imported pyrekordbox
+        code = (
+            "import sys, djkr8.rekordbox; "
+            "print(any(m in sys.modules for m in ('pyrekordbox', 'sqlalchemy')))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        assert out.strip() == "False"
+
+    def test_init_no_pyrekordbox(self, monkeypatch):
+        monkeypatch.setattr(rekordbox, "HAS_PYREKORDBOX", False)
+        with pytest.raises(ImportError, match="pyrekordbox is not installed"):
+            rekordbox.RekordboxLoader()
+
+    def test_init_import_failure(self, monkeypatch, rkb_env):
+        monkeypatch.setattr(
+            rekordbox, "_load_pyrekordbox", MagicMock(side_effect=ImportError("broken"))
+        )
+        with pytest.raises(ImportError, match="pyrekordbox could not be imported"):
             rekordbox.RekordboxLoader()
 
-    def test_init_db_error(self):
-        with (
-            patch("djkr8.rekordbox.HAS_PYREKORDBOX", True),
-            patch(
-                "djkr8.rekordbox.Rekordbox6Database",
-                side_effect=Exception("DB Locked"),
-            ),
-            pytest.raises(RuntimeError, match="Failed to initialize Rekordbox database"),
-        ):
+    def test_init_db_error(self, monkeypatch, rkb_env):
+        # Replaces the working database from rkb_env with one that fails to open
+        monkeypatch.setattr(
+            rekordbox, "Rekordbox6Database", MagicMock(side_effect=Exception("DB Locked"))
+        )
+        with pytest.raises(RuntimeError, match="Failed to initialize Rekordbox database"):
             rekordbox.RekordboxLoader()
 
-    def test_list_playlists(self):
-        with patch("djkr8.rekordbox.HAS_PYREKORDBOX", True):
-            mock_db = MagicMock()
-
-            # Mock playlist objects
-            p1 = MagicMock()
-            p1.ID = "100"
-            p1.Name = "Techno"
-            p1.Songs = ["s1", "s2"]  # Len 2
-
-            p2 = MagicMock()
-            p2.Name = "ROOT"  # Should be skipped
-
-            p3 = MagicMock()
-            p3.ID = "101"
-            p3.Name = "House"
-            # No Songs attr, should handle gracefully
-            del p3.Songs
-
-            mock_db.get_playlist.return_value = [p1, p2, p3]
-
-            with patch("djkr8.rekordbox.Rekordbox6Database", return_value=mock_db):
-                loader = rekordbox.RekordboxLoader()
-                playlists = loader.list_playlists()
-
-                assert len(playlists) == 2
-                assert playlists[0].name == "Techno"
-                assert playlists[0].count == 2
-                assert playlists[1].name == "House"
-                assert playlists[1].count == 0
-
-    def test_get_tracks(self):
-        with patch("djkr8.rekordbox.HAS_PYREKORDBOX", True):
-            mock_db = MagicMock()
-
-            # Mock playlist
-            pl = MagicMock()
-            pl.Name = "My Playlist"
-
-            # Mock songs
-            song1 = MagicMock()
-            song1.Content.Title = "Song A"
-            song1.Content.Artist.Name = "Artist A"
-            song1.Content.BPM = 12000  # 120.00
-            song1.Content.KeyName = "8A"  # Camelot
-            song1.Content.Rating = 4
-            song1.Content.Length = 180
-            song1.Content.FolderPath = "/path/to/a.mp3"
-            song1.Content.ID = 1001
-
-            song2 = MagicMock()
-            song2.Content.Title = "Song B"
-            song2.Content.Artist = None  # Unknown artist
-            song2.Content.BPM = 124  # Direct float/int? Code handles > 200 check
-            song2.Content.KeyName = None  # Ensure fallback
-            song2.Content.Tonality = "Fm"  # Standard notation -> 4A
-            song2.Content.ID = 1002
-
-            # Song 3 - Invalid (No key)
-            song3 = MagicMock()
-            song3.Content.KeyName = None
-            song3.Content.Tonality = None
-
-            pl.Songs = [song1, song2, song3]
-
-            mock_db.get_playlist.return_value = [pl]
-
-            with patch("djkr8.rekordbox.Rekordbox6Database", return_value=mock_db):
-                loader = rekordbox.RekordboxLoader()
-                tracks = loader.get_tracks("My Playlist")
-
-                assert len(tracks) == 2
-
-                t1 = tracks[0]
-                assert t1.id == "Artist A - Song A"
-                assert t1.bpm == 120.0
-                assert t1.key == "8A"
-                assert t1.path == "/path/to/a.mp3"
-                assert t1.rekordbox_id == 1001
-
-                t2 = tracks[1]
-                assert t2.id == "Unknown - Song B"
-                assert t2.bpm == 124.0  # Code: if > 200 div 100. 124 <= 200, so 124.0
-                assert t2.key == "4A"  # Fm -> 4A
-
-                # Test playlist not found
-                with pytest.raises(ValueError, match="Playlist 'Missing' not found"):
-                    loader.get_tracks("Missing")
-
-    def test_write_playlist_to_db(self, playlist_result):
-        with patch("djkr8.rekordbox.HAS_PYREKORDBOX", True):
-            mock_db = MagicMock()
-            new_pl = MagicMock()
-            mock_db.create_playlist.return_value = new_pl
-
-            # Mock get_content
-            mock_db.get_content.side_effect = lambda **kwargs: (
-                MagicMock() if kwargs.get("ID") == 101 else None
+    def test_list_playlists(self, rkb_env):
+        # Plain data holders for the playlist rows; only the database itself is a mock
+        p1 = SimpleNamespace(ID="100", Name="Techno", Songs=["s1", "s2"])
+        p2 = SimpleNamespace(Name="ROOT")  # Should be skipped
+        # No Songs attr, should handle gracefully
+        p3 = SimpleNamespace(ID="101", Name="House")
+
+        rkb_env.get_playlist.return_value = [p1, p2, p3]
+
+        loader = rekordbox.RekordboxLoader()
+        playlists = loader.list_playlists()
+
+        assert len(playlists) == 2
+        assert playlists[0].name == "Techno"
+        assert playlists[0].count == 2
+        assert playlists[1].name == "House"
+        assert playlists[1].count == 0
+
+        # Slotted and frozen: no per-instance __dict__, and hashable
+        assert not hasattr(playlists[0], "__dict__")
+        assert len(set(playlists)) == 2
+
+    def test_get_tracks(self, rkb_env):
+        pl = SimpleNamespace(ID="200", Name="My Playlist")
+
+        # Content rows share one schema, as DB rows do
+        song1 = SimpleNamespace(
+            Content=SimpleNamespace(
+                Title="Song A",
+                Artist=SimpleNamespace(Name="Artist A"),
+                BPM=12000,  # 120.00
+                KeyName="8A",  # Camelot
+                Tonality=None,
+                Rating=4,
+                Length=180,
+                FolderPath="/path/to/a.mp3",
+                ID=1001,
+            )
+        )
+        song2 = SimpleNamespace(
+            Content=SimpleNamespace(
+                Title="Song B",
+                Artist=None,  # Unknown artist
+                BPM=124,  # Code handles > 200 check
+                KeyName=None,  # Ensure fallback
+                Tonality="Fm",  # Standard notation -> 4A
+                Rating=0,
+                Length=0,
+                FolderPath=None,
+                ID=1002,
             )
+        )
+        # Song 3 - Invalid (No key)
+        song3 = SimpleNamespace(
+            Content=SimpleNamespace(
+                Title="Song C",
+                Artist=None,
+                BPM=12800,
+                KeyName=None,
+                Tonality=None,
+                Rating=0,
+                Length=0,
+                FolderPath=None,
+                ID=1003,
+            )
+        )
+
+        # Entries come from the eager-loading playlist songs query
+        songs_query = rkb_env.get_playlist_songs.return_value.options.return_value
+        songs_query.all.return_value = [song1, song2, song3]
+
+        rkb_env.get_playlist.return_value = [pl]
+
+        loader = rekordbox.RekordboxLoader()
+        tracks = loader.get_tracks("My Playlist")
+
+        assert len(tracks) == 2
+
+        t1 = tracks[0]
+        assert t1.id == "Artist A - Song A"
+        assert t1.bpm == 120.0
+        assert t1.key == "8A"
+        assert t1.path == "/path/to/a.mp3"
+        assert t1.rekordbox_id == 1001
+
+        t2 = tracks[1]
+        assert t2.id == "Unknown - Song B"
+        assert t2.bpm == 124.0  # Code: if > 200 div 100. 124 <= 200, so 124.0
+        assert t2.key == "4A"  # Fm -> 4A
+
+        rkb_env.get_playlist_songs.assert_called_once_with(PlaylistID=pl.ID)
+
+        # Test playlist not found
+        with pytest.raises(ValueError, match="Playlist 'Missing' not found"):
+            loader.get_tracks("Missing")
 
-            with patch("djkr8.rekordbox.Rekordbox6Database", return_value=mock_db):
-                loader = rekordbox.RekordboxLoader()
+    def test_get_tracks_without_optional_columns(self, rkb_env):
+        pl = SimpleNamespace(ID="200", Name="My Playlist")
 
-                # Modify one track to have no ID
-                playlist_result.playlist[1].rekordbox_id = None
+        # Content schema without FolderPath/ID/Tonality, like DjmdContent lacks Tonality
+        content = SimpleNamespace(
+            Title="Song A", Artist=None, BPM=12800, KeyName="Fm", Rating=3, Length=200
+        )
+        songs_query = rkb_env.get_playlist_songs.return_value.options.return_value
+        songs_query.all.return_value = [
+            SimpleNamespace(Content=content),
+            SimpleNamespace(Content=None),
+        ]
+        rkb_env.get_playlist.return_value = [pl]
 
-                loader.write_playlist_to_db(playlist_result, "New PL")
+        tracks = rekordbox.RekordboxLoader().get_tracks("My Playlist")
 
-                mock_db.create_playlist.assert_called_with("New PL")
-                # Only first track has ID 101 and exists
-                assert mock_db.add_to_playlist.call_count == 1
-                mock_db.commit.assert_called_once()
+        assert len(tracks) == 1
+        assert tracks[0].key == "4A"
+        assert tracks[0].path is None
+        assert tracks[0].rekordbox_id is None
 
-    def test_write_playlist_to_db_failure(self, playlist_result):
-        with patch("djkr8.rekordbox.HAS_PYREKORDBOX", True):
-            mock_db = MagicMock()
-            mock_db.create_playlist.side_effect = RuntimeError("Fail create")
+    def test_write_playlist_to_db(self, rkb_env, playlist_result):
+        new_pl = MagicMock()
+        rkb_env.create_playlist.return_value = new_pl
 
-            with patch("djkr8.rekordbox.Rekordbox6Database", return_value=mock_db):
-                loader = rekordbox.RekordboxLoader()
-                with pytest.raises(RuntimeError, match="Failed to create playlist"):
-                    loader.write_playlist_to_db(playlist_result, "Fail")
+        # Mock the batched content query: only ID 101 exists in the DB
+        query = rkb_env.get_content.return_value.filter.return_value
+        query.all.return_value = [SimpleNamespace(ID="101")]
+
+        loader = rekordbox.RekordboxLoader()
+
+        # Swap in a copy of one track that has no ID
+        playlist_result.playlist[1] = replace(playlist_result.playlist[1], rekordbox_id=None)
+
+        loader.write_playlist_to_db(playlist_result, "New PL")
+
+        rkb_env.create_playlist.assert_called_with("New PL")
+        # Only first track has ID 101 and exists
+        assert rkb_env.add_to_playlist.call_count == 1
+        # All IDs are fetched with one query instead of one per track
+        rkb_env.get_content.assert_called_once_with()
+        rkb_env.commit.assert_called_once()
+
+    def test_playlist_index_is_cached_until_write(self, rkb_env, playlist_result):
+        pl = SimpleNamespace(ID="200", Name="My Playlist")
+        rkb_env.get_playlist_songs.return_value.options.return_value.all.return_value = []
+        rkb_env.get_playlist.return_value = [pl]
+        rkb_env.get_content.return_value.filter.return_value.all.return_value = []
+
+        loader = rekordbox.RekordboxLoader()
+        loader.get_tracks("My Playlist")
+        loader.get_tracks("My Playlist")
+        loader.list_playlists()
+        assert rkb_env.get_playlist.call_count == 1
+
+        # Writing a playlist changes the tree, so the next lookup walks it again
+        loader.write_playlist_to_db(playlist_result, "New PL")
+        loader.get_tracks("My Playlist")
+        assert rkb_env.get_playlist.call_count == 2
+
+    def test_write_playlist_to_db_failure(self, rkb_env, playlist_result):
+        rkb_env.create_playlist.side_effect = RuntimeError("Fail create")
+
+        loader = rekordbox.RekordboxLoader()
+        with pytest.raises(RuntimeError, match="Failed to create playlist"):
+            loader.write_playlist_to_db(playlist_result, "Fail")
+
+
+class TestKeyConversion:
+    def test_musical_key_variants(self):
+        assert rekordbox._musical_key_to_camelot("Abm") == "1A"
+        assert rekordbox._musical_key_to_camelot("G# Minor") == "1A"
+        assert rekordbox._musical_key_to_camelot("gb min") == "11A"
+        assert rekordbox._musical_key_to_camelot("C") == "8B"
+        assert rekordbox._musical_key_to_camelot("Db Maj") == "3B"
+        assert rekordbox._musical_key_to_camelot("E major") == "12B"
+
+    def test_whitespace_variants(self):
+        assert rekordbox._musical_key_to_camelot(" F# m ") == "11A"
+        assert rekordbox._musical_key_to_camelot("\tAb Minor\n") == "1A"
+        assert rekordbox._musical_key_to_camelot("B ♭ major") == "6B"
+
+    def test_unknown_key(self):
+        assert rekordbox._musical_key_to_camelot("H") is None
+        assert rekordbox._musical_key_to_camelot("") is None
+        assert rekordbox._musical_key_to_camelot("Cmajor7") is None
 
 
 class TestRekordboxXML:
+    def test_quote_path_matches_quote(self):
+        from urllib.parse import quote
+
+        paths = [
+            "/music/t1.mp3",
+            "/Music/My Library/01 Track #1.mp3",
+            "/Música/Björk/Jóga 100%.flac",
+            "C:/Users/dj/track?.wav",
+            "no_slash name.mp3",
+            "",
+        ]
+        for path in paths:
+            assert rekordbox._quote_path(path) == quote(path)
+
     def test_write_rekordbox_xml(self, playlist_result, tmp_path):
         output_file = tmp_path / "test_export.xml"
         rekordbox.write_rekordbox_xml(playlist_result, "SourcePL", output_file)
 
         assert output_file.exists()
 
-        tree = ET.parse(output_file)
-        root = tree.getroot()
-
-        assert root.tag == "DJ_PLAYLISTS"
-
-        collection = root.find("COLLECTION")
-        assert collection is not None
-        assert len(collection) == 2
+        # One streaming pass: collection tracks by TrackID, playlist refs and playlist nodes
+        root_tag = None
+        collection_tracks = {}
+        track_refs = []
+        playlist_nodes = []
+        for event, el in ET.iterparse(output_file, events=("start", "end")):
+            if event == "start":
+                root_tag = root_tag or el.tag
+                continue
+            if el.tag == "TRACK" and "TrackID" in el.attrib:
+                collection_tracks[el.get("TrackID")] = dict(el.attrib)
+            elif el.tag == "TRACK":
+                track_refs.append(el.get("Key"))
+            elif el.tag == "NODE" and el.get("Type") == "1":
+                playlist_nodes.append({**el.attrib, "children": len(el)})
+            if el.tag in ("TRACK", "NODE"):
+                el.clear()
+
+        assert root_tag == "DJ_PLAYLISTS"
+        assert list(collection_tracks) == ["1", "2"]
 
         # Check track 1
-        t1 = collection.find("./TRACK[@TrackID='1']")
-        assert t1 is not None
-        assert t1.get("Name") == "Track 1"
-        assert t1.get("AverageBpm") == "120.0"
-        assert t1.get("Location") == "file://localhost/music/t1.mp3"
-
-        playlists = root.find("PLAYLISTS")
-        assert playlists is not None
-        pl_node = playlists.find(".//NODE[@Type='1']")
-        assert pl_node is not None
-        assert pl_node.get("Name", "").startswith("SourcePL_")
-        assert len(pl_node) == 2
-
-        # Check track ref
-        ref1 = pl_node.find("./TRACK[@Key='1']")
-        assert ref1 is not None
+        t1 = collection_tracks["1"]
+        assert t1["Name"] == "Track 1"
+        assert t1["AverageBpm"] == "120.0"
+        assert t1["Location"] == "file://localhost/music/t1.mp3"
+
+        (pl_node,) = playlist_nodes
+        assert pl_node["Name"].startswith("SourcePL_")
+        assert pl_node["children"] == 2
+
+        # Check track refs
+        assert track_refs == ["1", "2"]
+
+    def test_write_rekordbox_xml_escapes_attributes(self, tmp_path):
+        track = Track(
+            id="t1",
+            key="8A",
+            bpm=128.0,
+            title='Say "Hi" & <Bye>',
+            artist="Line\nBreak",
+            path="/music/a & b.mp3",
+        )
+        output_file = tmp_path / "escaped.xml"
+        rekordbox.write_rekordbox_xml(PlaylistResult(playlist=[track]), "PL & Co", output_file)
+
+        root = ET.parse(output_file).getroot()
+        t1 = root.find("./COLLECTION/TRACK")
+        assert t1.get("Name") == 'Say "Hi" & <Bye>'
+        assert t1.get("Artist") == "Line\nBreak"
+        assert t1.get("Location") == "file://localhost/music/a%20%26%20b.mp3"
+        assert root.find(".//NODE[@Type='1']").get("Name").startswith("PL & Co_")
+
+    def test_write_rekordbox_xml_empty_playlist(self, tmp_path):
+        output_file = tmp_path / "empty.xml"
+        rekordbox.write_rekordbox_xml(PlaylistResult(playlist=[]), "Empty", output_file)
+
+        root = ET.parse(output_file).getroot()
+        assert root.find("COLLECTION").get("Entries") == "0"
+        assert len(root.find(".//NODE[@Type='1']")) == 0
+
+    def test_write_rekordbox_xml_failure_keeps_existing_file(self, tmp_path, sample_tracks):
+        output_file = tmp_path / "out.xml"
+        output_file.write_text("previous export")
+        # A track whose path is not a string fails midway through the collection
+        broken = replace(sample_tracks[0], path=42)
+        result = PlaylistResult(playlist=[sample_tracks[1], broken])
+
+        with pytest.raises(AttributeError):
+            rekordbox.write_rekordbox_xml(result, "Broken", output_file)
+
+        assert output_file.read_text() == "previous export"
+        assert [p.name for p in tmp_path.iterdir()] == ["out.xml"]